@@ -0,0 +1,43 @@
+import copy
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+
+from api.cache import LocalLRUCache
+
+local_tokens = LocalLRUCache(
+    settings.TOKEN_LOCAL_CACHE_SIZE, settings.TOKEN_LOCAL_CACHE_TIMEOUT
+)
+
+
+def token_cache_key(key):
+    return f'auth-token:{key}'
+
+
+def invalidate_token(key):
+    local_tokens.delete(key)
+    cache.delete(token_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that caches token -> user lookups.
+
+    Lookups are kept for TOKEN_LOCAL_CACHE_TIMEOUT seconds in the process
+    and, with a shared cache (TOKEN_CACHE), for TOKEN_CACHE_TIMEOUT seconds
+    there.
+    """
+
+    def authenticate_credentials(self, key):
+        user = local_tokens.get(key)
+        if user is None:
+            if settings.TOKEN_CACHE:
+                user = cache.get(token_cache_key(key))
+            if user is None:
+                user, token = super().authenticate_credentials(key)
+                if settings.TOKEN_CACHE:
+                    cache.set(token_cache_key(key), user,
+                              settings.TOKEN_CACHE_TIMEOUT)
+            local_tokens.set(key, user)
+        user = copy.copy(user)
+        return (user, self.get_model()(key=key, user=user))
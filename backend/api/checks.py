@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if settings.SHARED_CACHE:
+        return []
+    return [Warning(
+        'CACHE_BACKEND is a per-process cache.',
+        hint=('Each backend process keeps its own rate limit counters, so '
+              'the limits are multiplied by the number of processes; the '
+              'shared token and recipe id caches are disabled. Use a cache '
+              'shared by the processes, e.g. PyMemcacheCache.'),
+        id='api.W001',
+    )]
@@ -0,0 +1,89 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/javascript', 'application/xml',
+    'image/svg+xml',
+)
+
+
+def brotli_compress(data):
+    return brotli.compress(data, quality=settings.BROTLI_QUALITY)
+
+
+def brotli_compress_sequence(sequence):
+    compressor = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+    for item in sequence:
+        data = compressor.process(item)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+# In order of preference when the client accepts several equally.
+ENCODINGS = {'gzip': (compress_string, compress_sequence)}
+if brotli is not None:
+    ENCODINGS = {
+        'br': (brotli_compress, brotli_compress_sequence), **ENCODINGS
+    }
+
+
+def choose_encoding(accept_encoding):
+    """Pick the supported encoding with the highest q-value, if any."""
+    accepted = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.partition(';')
+        quality = 1.0
+        name, _, value = params.strip().partition('=')
+        if name.strip() == 'q':
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(response):
+    content_type = response.get('Content-Type', '').split(';')[0].lower()
+    return (content_type.startswith('text/')
+            or content_type in COMPRESSIBLE_TYPES
+            or content_type.endswith('+json'))
+
+
+def compress_content(response, encoding):
+    """Compress the body of a response, reusing the cached result.
+
+    Compressed bodies of responses with an ETag, i.e. of pages clients ask
+    for again, are kept in the cache under a digest of the body, so popular
+    pages are compressed once instead of on every request. The ETag itself
+    is not a digest of the body: the body can change without it, e.g. when
+    an ingredient is renamed or the request came through another host.
+    """
+    compress = ENCODINGS[encoding][0]
+    if not response.get('ETag') or not settings.COMPRESSION_CACHE_TIMEOUT:
+        return compress(response.content)
+    digest = hashlib.md5(response.content).hexdigest()
+    key = f'compressed:{encoding}:{digest}'
+    compressed = cache.get(key)
+    if compressed is None:
+        compressed = compress(response.content)
+        cache.set(key, compressed, settings.COMPRESSION_CACHE_TIMEOUT)
+    return compressed
+
+
+def compress_streaming_content(response, encoding):
+    return ENCODINGS[encoding][1](response.streaming_content)
@@ -0,0 +1,73 @@
+import hashlib
+
+from django.db.models import Count, Max, Value
+from django.utils.cache import (get_conditional_response, patch_vary_headers,
+                                quote_etag)
+from django.utils.http import http_date
+
+from recipes.models import Favorite, ShoppingCart, Tag
+from users.models import Subscribe
+
+
+def get_user_version(user):
+    """Last id and count of the favorites, cart and subscriptions of `user`.
+
+    Every add raises a last id and every remove lowers a count, so the
+    result changes whenever the per-user flags in a response can.
+    """
+    if not user.is_authenticated:
+        return ()
+    querysets = [
+        model.objects.filter(user=user).order_by().values('user').annotate(
+            kind=Value(kind), last=Max('id'), count=Count('id')
+        ).values_list('kind', 'last', 'count')
+        for kind, model in enumerate((Favorite, ShoppingCart, Subscribe))
+    ]
+    return tuple(sorted(querysets[0].union(*querysets[1:], all=True)))
+
+
+def get_tags_version():
+    return Tag.objects.aggregate(count=Count('id'), updated=Max('updated_at'))
+
+
+class ConditionalGetMixin:
+    """Answers `If-None-Match` and `If-Modified-Since` for list and retrieve.
+
+    Views return a cheap version of the response from `get_version()`;
+    when it matches the client's copy a 304 is sent without querying or
+    serializing the data itself.
+    """
+
+    def get_version(self):
+        """Return `(version, last_modified)`; `last_modified` may be None."""
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_conditional_response(self, handler, request, *args, **kwargs):
+        version, last_modified = self.get_version()
+        etag = quote_etag(hashlib.md5(repr((
+            request.get_full_path(), request.user.pk, version
+        )).encode()).hexdigest())
+        if last_modified is not None:
+            last_modified = int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code not in (200, 304):
+            return response
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Authorization',))
+        return response
@@ -0,0 +1,173 @@
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from rest_framework.authtoken.models import Token
+
+from api.ingredient_index import log_ingredient_changes
+from api.recipe_ids import invalidate_recipe_ids
+from foodgram.storage import count_references
+from recipes.models import (Favorite, IngredientInRecipe, Recipe, RecipeBucket,
+                            RecipeScore, ShoppingCart)
+from users.models import Subscribe, User
+
+BATCH_SIZE = 1000
+
+# Rows removed before the recipes they point to, so deleting the recipes
+# themselves does not cascade.
+RECIPE_DEPENDENTS = (
+    Favorite, ShoppingCart, IngredientInRecipe, Recipe.tags.through,
+    Recipe.ingredients.through, RecipeBucket, RecipeScore,
+)
+
+
+def hide_recipes(recipe_ids):
+    """Soft-delete recipes; `purge_deleted` removes them later."""
+    Recipe.all_objects.filter(id__in=recipe_ids).update(is_deleted=True)
+    log_ingredient_changes(recipe_ids)
+    invalidate_recipe_ids()
+
+
+@transaction.atomic
+def hide_user(user):
+    """Soft-delete a user together with all of their recipes."""
+    User.objects.filter(id=user.id).update(is_active=False, is_deleted=True)
+    recipe_ids = list(
+        Recipe.objects.filter(author=user).values_list('id', flat=True)
+    )
+    hide_recipes(recipe_ids)
+    Token.objects.filter(user=user).delete()
+
+
+def raw_delete(model, ids):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {model._meta.db_table} '
+            f'WHERE {model._meta.pk.column} IN %s',
+            [tuple(ids)]
+        )
+        return cursor.rowcount
+
+
+def delete_in_batches(queryset, batch_size=BATCH_SIZE, pause=0):
+    """Delete the rows of `queryset` in transactions of `batch_size` rows.
+
+    Unlike `QuerySet.delete()` nothing is loaded into memory and no
+    signals are sent, so only use it for rows without dependents.
+    """
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            deleted += raw_delete(queryset.model, ids)
+        time.sleep(pause)
+
+
+def get_file_age(storage, name):
+    """Seconds since the file was modified, or None if it is missing."""
+    try:
+        modified = storage.get_modified_time(name)
+    except FileNotFoundError:
+        return None
+    return time.time() - modified.timestamp()
+
+
+def delete_unused_files(names, storage=default_storage, min_age=None):
+    """Delete files that no row of any file field refers to anymore.
+
+    Uploads are deduplicated, so the same file may belong to several
+    recipes and users, and an upload may reuse a file whose row is not
+    committed yet. Files modified in the last `min_age` seconds,
+    MEDIA_DELETE_GRACE_SECONDS by default, are checked again by a job once
+    that time has passed.
+    """
+    if min_age is None:
+        min_age = settings.MEDIA_DELETE_GRACE_SECONDS
+    ages = {name: get_file_age(storage, name) for name in filter(None, names)}
+    ages = {name: age for name, age in ages.items() if age is not None}
+    unused = set(ages) - set(count_references(storage, list(ages)))
+    deleted, recent = 0, []
+    for name in sorted(unused):
+        # Checked before and after counting the references, as a reused
+        # file is touched before its row is written.
+        age = get_file_age(storage, name)
+        if age is None:
+            continue
+        if min(ages[name], age) < min_age:
+            recent.append(name)
+            continue
+        storage.delete(name)
+        deleted += 1
+    # Eager jobs cannot wait; purge_deleted --orphaned-files removes the
+    # files later.
+    if recent and not settings.JOBS_EAGER:
+        # Imported here, as api.tasks imports this module.
+        from api.tasks import delete_replaced_files
+        delete_replaced_files.delay(recent, countdown=min_age)
+    return deleted
+
+
+def purge_recipes(batch_size=BATCH_SIZE, pause=0):
+    """Delete hidden recipes batch by batch, with their rows and images."""
+    purged = files = 0
+    hidden = Recipe.all_objects.filter(is_deleted=True)
+    while True:
+        recipes = list(hidden.values_list('id', 'image')[:batch_size])
+        if not recipes:
+            return purged, files
+        recipe_ids = [recipe_id for recipe_id, _ in recipes]
+        for model in RECIPE_DEPENDENTS:
+            delete_in_batches(
+                model.objects.filter(recipe_id__in=recipe_ids),
+                batch_size, pause
+            )
+        with transaction.atomic():
+            purged += raw_delete(Recipe, recipe_ids)
+        files += delete_unused_files([image for _, image in recipes])
+        time.sleep(pause)
+
+
+def purge_users(batch_size=BATCH_SIZE, pause=0):
+    """Delete soft-deleted users whose recipes were already purged."""
+    purged = 0
+    for user in User.objects.filter(is_deleted=True).iterator():
+        if Recipe.all_objects.filter(author=user).exists():
+            continue
+        for queryset in (
+            Favorite.objects.filter(user=user),
+            ShoppingCart.objects.filter(user=user),
+            Subscribe.objects.filter(user=user),
+            Subscribe.objects.filter(author=user),
+        ):
+            delete_in_batches(queryset, batch_size, pause)
+        # The few remaining rows (tokens, admin log, social auth) go
+        # through the regular collector.
+        user.delete()
+        delete_unused_files([user.avatar.name])
+        purged += 1
+    return purged
+
+
+def find_orphaned_files(field, min_age):
+    """Yield files in the upload directory of `field` no row refers to.
+
+    Files younger than `min_age` seconds are skipped, as their row may not
+    be committed yet.
+    """
+    storage = field.storage
+    directory = field.upload_to
+    _, names = storage.listdir(directory)
+    now = time.time()
+    for start in range(0, len(names), BATCH_SIZE):
+        paths = {
+            f'{directory}/{name}' if directory else name
+            for name in names[start:start + BATCH_SIZE]
+        }
+        used = set(count_references(storage, paths))
+        for path in sorted(paths - used):
+            modified = storage.get_modified_time(path).timestamp()
+            if now - modified >= min_age:
+                yield path
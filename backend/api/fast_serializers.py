@@ -0,0 +1,364 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db import connections
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from rest_framework import serializers
+from django.utils.functional import cached_property
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from recipes.models import (Favorite, IngredientInRecipe, Recipe,
+                            ShoppingCart)
+from users.models import Subscribe, User
+
+
+class ValuesListSerializer:
+    """Read-only list serializer over `.values()` rows.
+
+    Produces the same output as the matching ModelSerializer with
+    `many=True`, but related data is loaded with one query per relation for
+    the whole page and no model instances are created. `fields` limits the
+    output, and relations that are not requested are not queried.
+
+    Under request profiling, the time spent on each field, including the
+    query of its relation, is added to the profile.
+    """
+    # Output field -> model column it is read from.
+    columns = {}
+
+    class Meta:
+        fields = ()
+
+    def __init__(self, instance, many=True, context=None, fields=None):
+        self.instance = instance
+        self.context = context or {}
+        self.fields = self.Meta.fields if fields is None else fields
+
+    @classmethod
+    def get_values_fields(cls, fields=None):
+        if fields is None:
+            fields = cls.Meta.fields
+        return ('id',) + tuple(
+            cls.columns[field] for field in fields
+            if field in cls.columns and field != 'id'
+        )
+
+    @cached_property
+    def profile(self):
+        return getattr(self.context.get('request'), 'profile', None)
+
+    def add_field_timing(self, field, started):
+        self.profile.add_field_timing(type(self).__name__, field,
+                                      time.perf_counter() - started)
+
+    @contextmanager
+    def timed(self, field):
+        if self.profile is None:
+            yield
+            return
+        started = time.perf_counter()
+        yield
+        self.add_field_timing(field, started)
+
+    @property
+    def user(self):
+        request = self.context.get('request')
+        if request is None or request.user.is_anonymous:
+            return None
+        return request.user
+
+    def file_url(self, field, name):
+        if not name:
+            return None
+        url = field.storage.url(name)
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+    def get_subscribed_ids(self, author_ids):
+        if self.user is None:
+            return set()
+        return set(
+            Subscribe.objects
+            .filter(user=self.user, author_id__in=author_ids)
+            .values_list('author_id', flat=True)
+        )
+
+    def get_user_data(self, row, fields, subscribed_ids, profile=None):
+        data = {}
+        for field in fields:
+            if profile is not None:
+                started = time.perf_counter()
+            if field == 'is_subscribed':
+                data[field] = row['id'] in subscribed_ids
+            elif field == 'avatar':
+                data[field] = self.file_url(User._meta.get_field('avatar'),
+                                            row['avatar'])
+            elif field in UserListSerializer.columns:
+                data[field] = row[field]
+            if profile is not None:
+                self.add_field_timing(field, started)
+        return data
+
+    @property
+    def data(self):
+        return ReturnList(
+            self.to_representation(list(self.instance)), serializer=self
+        )
+
+
+class UserListSerializer(ValuesListSerializer):
+    """Values-based counterpart of CustomUserSerializer."""
+    columns = {
+        field: field
+        for field in ('email', 'id', 'username', 'first_name', 'last_name',
+                      'avatar')
+    }
+
+    class Meta:
+        fields = ('email', 'id', 'username', 'first_name', 'last_name',
+                  'is_subscribed', 'avatar')
+
+    def to_representation(self, rows):
+        subscribed_ids = set()
+        if 'is_subscribed' in self.fields:
+            with self.timed('is_subscribed'):
+                subscribed_ids = self.get_subscribed_ids(
+                    [row['id'] for row in rows]
+                )
+        return [
+            self.get_user_data(row, self.fields, subscribed_ids, self.profile)
+            for row in rows
+        ]
+
+
+class RecipeListSerializer(ValuesListSerializer):
+    """Values-based counterpart of RecipeSerializer."""
+    columns = {
+        'id': 'id',
+        'author': 'author_id',
+        'name': 'name',
+        'image': 'image',
+        'text': 'text',
+        'cooking_time': 'cooking_time',
+    }
+
+    class Meta:
+        fields = ('id', 'tags', 'author', 'ingredients', 'is_favorited',
+                  'is_in_shopping_cart', 'name', 'image', 'text',
+                  'cooking_time')
+
+    def get_tags(self, recipe_ids):
+        tags = defaultdict(list)
+        recipe_tags = (
+            Recipe.tags.through.objects
+            .filter(recipe_id__in=recipe_ids)
+            .order_by('id')
+            .values_list('recipe_id', 'tag__id', 'tag__name', 'tag__slug')
+        )
+        for recipe_id, tag_id, name, slug in recipe_tags:
+            tags[recipe_id].append({'id': tag_id, 'name': name, 'slug': slug})
+        return tags
+
+    def get_ingredients(self, recipe_ids):
+        ingredients = defaultdict(list)
+        recipe_ingredients = (
+            IngredientInRecipe.objects
+            .filter(recipe_id__in=recipe_ids)
+            .order_by('id')
+            .values_list('recipe_id', 'id', 'amount')
+        )
+        # IngredientInRecipeSerializer outputs the row id as `id`.
+        for recipe_id, row_id, amount in recipe_ingredients:
+            ingredients[recipe_id].append({'id': row_id, 'amount': amount})
+        return ingredients
+
+    def get_authors(self, author_ids):
+        fields = UserListSerializer.Meta.fields
+        subscribed_ids = self.get_subscribed_ids(author_ids)
+        return {
+            row['id']: self.get_user_data(row, fields, subscribed_ids)
+            for row in User.objects.filter(id__in=author_ids).values(
+                *UserListSerializer.get_values_fields()
+            )
+        }
+
+    def get_user_recipe_ids(self, model, recipe_ids):
+        if self.user is None:
+            return set()
+        return set(
+            model.objects
+            .filter(user=self.user, recipe_id__in=recipe_ids)
+            .values_list('recipe_id', flat=True)
+        )
+
+    def to_representation(self, rows):
+        fields = self.fields
+        recipe_ids = [row['id'] for row in rows]
+        if 'tags' in fields:
+            with self.timed('tags'):
+                tags = self.get_tags(recipe_ids)
+        if 'ingredients' in fields:
+            with self.timed('ingredients'):
+                ingredients = self.get_ingredients(recipe_ids)
+        if 'author' in fields:
+            with self.timed('author'):
+                authors = self.get_authors(
+                    {row['author_id'] for row in rows}
+                )
+        if 'is_favorited' in fields:
+            with self.timed('is_favorited'):
+                favorited_ids = self.get_user_recipe_ids(Favorite, recipe_ids)
+        if 'is_in_shopping_cart' in fields:
+            with self.timed('is_in_shopping_cart'):
+                in_cart_ids = self.get_user_recipe_ids(
+                    ShoppingCart, recipe_ids
+                )
+        image_field = Recipe._meta.get_field('image')
+        profile = self.profile
+
+        data = []
+        for row in rows:
+            recipe = {}
+            for field in fields:
+                if profile is not None:
+                    started = time.perf_counter()
+                if field == 'tags':
+                    recipe[field] = tags[row['id']]
+                elif field == 'ingredients':
+                    recipe[field] = ingredients[row['id']]
+                elif field == 'author':
+                    recipe[field] = authors[row['author_id']]
+                elif field == 'is_favorited':
+                    recipe[field] = row['id'] in favorited_ids
+                elif field == 'is_in_shopping_cart':
+                    recipe[field] = row['id'] in in_cart_ids
+                elif field == 'image':
+                    recipe[field] = self.file_url(image_field, row['image'])
+                elif field in self.columns:
+                    recipe[field] = row[field]
+                if profile is not None:
+                    self.add_field_timing(field, started)
+            data.append(recipe)
+        return data
+
+
+class SubscriptionListSerializer(ValuesListSerializer):
+    """Values-based counterpart of SubscriptionsSerializer."""
+    columns = UserListSerializer.columns
+
+    class Meta:
+        fields = ('email', 'id', 'username', 'first_name', 'last_name',
+                  'is_subscribed', 'recipes', 'recipes_count', 'avatar')
+
+    def get_recipes_limit(self):
+        limit = self.context['request'].GET.get('recipes_limit', None)
+        if limit is None:
+            return None
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise serializers.ValidationError(
+                'recipes_limit must be an integer.'
+            )
+        if limit < 0:
+            raise serializers.ValidationError(
+                'recipes_limit must be a non-negative integer.'
+            )
+        return limit
+
+    def get_recipes(self, author_ids, limit):
+        """Return `(recipes, counts)` of the authors, `limit` recipes each.
+
+        Recipes are numbered per author in the database, so only the rows
+        that are shown are loaded, and the count of all of them comes along
+        with the first one.
+        """
+        queryset = (
+            Recipe.objects
+            .filter(author_id__in=author_ids)
+            .annotate(
+                row_number=Window(RowNumber(), partition_by=F('author_id'),
+                                  order_by=F('id').asc()),
+                recipes_count=Window(Count('id'), partition_by=F('author_id')),
+            )
+            .values('author_id', 'id', 'name', 'image', 'cooking_time',
+                    'row_number', 'recipes_count')
+        )
+        sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+        rows_sql = (
+            'SELECT author_id, id, name, image, cooking_time, row_number, '
+            f'recipes_count FROM ({sql}) AS ranked'
+        )
+        if limit is not None:
+            # The first row is kept even when no recipes are requested,
+            # for its count.
+            rows_sql += ' WHERE row_number <= %s OR row_number = 1'
+            params = (*params, limit)
+        rows_sql += ' ORDER BY author_id, row_number'
+
+        recipes = defaultdict(list)
+        counts = {}
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(rows_sql, params)
+            for (author_id, recipe_id, name, image, cooking_time, row_number,
+                 count) in cursor.fetchall():
+                counts[author_id] = count
+                if limit is None or row_number <= limit:
+                    recipes[author_id].append({
+                        'id': recipe_id, 'name': name, 'image': image,
+                        'cooking_time': cooking_time,
+                    })
+        return recipes, counts
+
+    def get_recipes_count(self, author_ids):
+        return dict(
+            Recipe.objects
+            .filter(author_id__in=author_ids)
+            .values('author_id')
+            .annotate(count=Count('id'))
+            .values_list('author_id', 'count')
+        )
+
+    def to_representation(self, rows):
+        fields = self.fields
+        author_ids = [row['id'] for row in rows]
+        subscribed_ids = set()
+        if 'is_subscribed' in fields:
+            with self.timed('is_subscribed'):
+                subscribed_ids = self.get_subscribed_ids(author_ids)
+        if 'recipes' in fields:
+            # The counts come with the recipes.
+            with self.timed('recipes'):
+                recipes, recipes_count = self.get_recipes(
+                    author_ids, self.get_recipes_limit()
+                )
+        elif 'recipes_count' in fields:
+            with self.timed('recipes_count'):
+                recipes_count = self.get_recipes_count(author_ids)
+        image_field = Recipe._meta.get_field('image')
+
+        data = []
+        for row in rows:
+            user = self.get_user_data(row, fields, subscribed_ids,
+                                      self.profile)
+            if 'recipes' in fields:
+                started = time.perf_counter()
+                user['recipes'] = [
+                    {
+                        'id': recipe['id'],
+                        'name': recipe['name'],
+                        'image': self.file_url(image_field, recipe['image']),
+                        'cooking_time': recipe['cooking_time'],
+                    }
+                    for recipe in recipes[row['id']]
+                ]
+                if self.profile is not None:
+                    self.add_field_timing('recipes', started)
+            if 'recipes_count' in fields:
+                user['recipes_count'] = recipes_count.get(row['id'], 0)
+            data.append({field: user[field] for field in fields})
+        return data
@@ -14,11 +14,22 @@ class RecipeFilter(filters.FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
+    ordering = filters.ChoiceFilter(
+        choices=(('popular', 'popular'), ('trending', 'trending')),
+        method='order_by_score'
+    )
 
     class Meta:
         model = Recipe
         fields = ['tags', 'is_favorited', 'is_in_shopping_cart']
 
+    def order_by_score(self, queryset, name, value):
+        # Filtering on the score makes it an inner join, so the database can
+        # walk the score index and stop after one page.
+        return queryset.filter(score__isnull=False).order_by(
+            f'-score__{value}', '-id'
+        )
+
     def filter_is_favorited(self, queryset, name, value):
         user = self.request.user
         if not user.is_authenticated:
@@ -0,0 +1,244 @@
+import os
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Min, Q
+
+from recipes.models import IngredientIndexChange, IngredientInRecipe
+
+ID_DTYPE = np.int32
+CHUNK_SIZE = 100000
+# Ingredients used by more than 1/DENSE_RATIO of recipes also get a bitset,
+# adding it to the counters is cheaper than scattering their recipe ids.
+DENSE_RATIO = 16
+# Seconds a skipped change id is waited for. Ids are taken when a change is
+# logged but become visible when its transaction commits, so a later id can
+# be seen first; a gap that stays longer is taken for a rollback.
+PENDING_TIMEOUT = 600
+
+
+def log_ingredient_changes(recipe_ids):
+    IngredientIndexChange.objects.bulk_create(
+        IngredientIndexChange(recipe_id=recipe_id) for recipe_id in recipe_ids
+    )
+
+
+def read_pairs(queryset):
+    """Load (ingredient_id, recipe_id) rows into two int arrays."""
+    ingredient_chunks, recipe_chunks = [], []
+    rows = queryset.values_list('ingredient_id', 'recipe_id').iterator(
+        chunk_size=CHUNK_SIZE
+    )
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            pairs = np.array(chunk, dtype=ID_DTYPE)
+            ingredient_chunks.append(pairs[:, 0])
+            recipe_chunks.append(pairs[:, 1])
+            chunk = []
+    if chunk:
+        pairs = np.array(chunk, dtype=ID_DTYPE)
+        ingredient_chunks.append(pairs[:, 0])
+        recipe_chunks.append(pairs[:, 1])
+    if not ingredient_chunks:
+        return np.empty(0, ID_DTYPE), np.empty(0, ID_DTYPE)
+    return np.concatenate(ingredient_chunks), np.concatenate(recipe_chunks)
+
+
+class IngredientIndex:
+    """In-memory inverted index: ingredient id -> sorted recipe ids.
+
+    `sizes[recipe_id]` holds the number of ingredients of a recipe, so the
+    number of missing ingredients is `sizes - matched`. Popular ingredients
+    are also kept as boolean masks over recipe ids. The index follows
+    IngredientIndexChange rows to pick up recipes that were created, edited
+    or deleted since it was built. Both are read from the primary, as a
+    replica may lag behind the change log.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.postings = {}
+        self.masks = {}
+        self.sizes = np.zeros(0, dtype=np.uint16)
+        self.last_change_id = None
+        # Skipped change id -> when it was first missed.
+        self.pending = {}
+
+    def build(self):
+        change_ids = np.fromiter(
+            IngredientIndexChange.objects.using(DEFAULT_DB_ALIAS)
+            .values_list('id', flat=True),
+            dtype=np.int64
+        )
+        ingredient_ids, recipe_ids = read_pairs(
+            IngredientInRecipe.objects.using(DEFAULT_DB_ALIAS)
+            .filter(recipe__is_deleted=False)
+        )
+        self.load_pairs(ingredient_ids, recipe_ids,
+                        int(change_ids.min(initial=1)) - 1)
+        self.pending = {}
+        self.track_changes(change_ids)
+
+    def load_pairs(self, ingredient_ids, recipe_ids, last_change_id):
+        order = np.lexsort((recipe_ids, ingredient_ids))
+        ingredient_ids, recipe_ids = ingredient_ids[order], recipe_ids[order]
+        keys, offsets = np.unique(ingredient_ids, return_index=True)
+        offsets = np.append(offsets, len(recipe_ids))
+        self.postings = {
+            int(key): recipe_ids[offsets[i]:offsets[i + 1]]
+            for i, key in enumerate(keys)
+        }
+        size = int(recipe_ids.max()) + 1 if len(recipe_ids) else 0
+        self.sizes = np.bincount(recipe_ids, minlength=size).astype(np.uint16)
+        self.masks = {}
+        self.update_masks(self.postings)
+        self.last_change_id = last_change_id
+
+    def update_masks(self, keys):
+        for key in keys:
+            recipes = self.postings[key]
+            if len(recipes) * DENSE_RATIO > len(self.sizes):
+                mask = np.zeros(len(self.sizes), dtype=bool)
+                mask[recipes] = True
+                self.masks[key] = mask
+            else:
+                self.masks.pop(key, None)
+
+    def save(self, path):
+        ingredient_ids = np.concatenate([
+            np.full(len(recipes), key, dtype=ID_DTYPE)
+            for key, recipes in self.postings.items()
+        ] or [np.empty(0, ID_DTYPE)])
+        recipe_ids = np.concatenate(
+            list(self.postings.values()) or [np.empty(0, ID_DTYPE)]
+        )
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            np.savez(file, ingredient_ids=ingredient_ids,
+                     recipe_ids=recipe_ids,
+                     last_change_id=np.array(self.last_change_id),
+                     pending_change_ids=np.array(list(self.pending),
+                                                 dtype=np.int64))
+
+    def load(self, path):
+        with np.load(path) as data:
+            self.load_pairs(data['ingredient_ids'], data['recipe_ids'],
+                            int(data['last_change_id']))
+            pending = (data['pending_change_ids'].tolist()
+                       if 'pending_change_ids' in data else [])
+        self.pending = dict.fromkeys(pending, time.monotonic())
+
+    def track_changes(self, change_ids):
+        """Move past `change_ids`, remembering the ids skipped on the way."""
+        now = time.monotonic()
+        for change_id in change_ids.tolist():
+            self.pending.pop(change_id, None)
+        last_change_id = int(change_ids.max(initial=self.last_change_id))
+        skipped = np.setdiff1d(
+            np.arange(self.last_change_id + 1, last_change_id + 1),
+            change_ids
+        )
+        self.pending.update(dict.fromkeys(skipped.tolist(), now))
+        self.pending = {
+            change_id: missed for change_id, missed in self.pending.items()
+            if now - missed < PENDING_TIMEOUT
+        }
+        self.last_change_id = last_change_id
+
+    def is_behind(self, first_change_id):
+        """Whether changes the index has not seen were already pruned."""
+        return self.last_change_id is None or (
+            first_change_id is not None
+            and first_change_id > self.last_change_id + 1
+        )
+
+    def sync(self):
+        """Build the index or apply the changes logged since the last call.
+
+        Besides the changes after the newest one applied, the ids skipped so
+        far are read again, in case their transactions committed late.
+        """
+        changes = IngredientIndexChange.objects.using(DEFAULT_DB_ALIAS)
+        first_change_id = changes.aggregate(first=Min('id'))['first']
+        if self.is_behind(first_change_id):
+            path = settings.INGREDIENT_INDEX_PATH
+            if path and os.path.exists(path):
+                self.load(path)
+            if self.is_behind(first_change_id):
+                self.build()
+                return
+        rows = np.array(
+            changes.filter(
+                Q(id__gt=self.last_change_id) | Q(id__in=list(self.pending))
+            ).values_list('id', 'recipe_id'),
+            dtype=np.int64
+        ).reshape(-1, 2)
+        self.track_changes(rows[:, 0])
+        if not len(rows):
+            return
+        changed = np.unique(rows[:, 1]).astype(ID_DTYPE)
+        ingredient_ids, recipe_ids = read_pairs(
+            IngredientInRecipe.objects.using(DEFAULT_DB_ALIAS).filter(
+                recipe_id__in=changed.tolist(), recipe__is_deleted=False
+            )
+        )
+        self.apply(changed, ingredient_ids, recipe_ids)
+
+    def apply(self, changed, ingredient_ids, recipe_ids):
+        # Arrays are replaced rather than modified in place, so searches that
+        # already took a reference keep a consistent view.
+        touched = set()
+        for key, recipes in list(self.postings.items()):
+            positions = np.searchsorted(recipes, changed)
+            inside = positions < len(recipes)
+            positions, candidates = positions[inside], changed[inside]
+            found = positions[recipes[positions] == candidates]
+            if len(found):
+                self.postings[key] = np.delete(recipes, found)
+                touched.add(key)
+        for key in np.unique(ingredient_ids):
+            added = recipe_ids[ingredient_ids == key]
+            recipes = self.postings.get(int(key), np.empty(0, ID_DTYPE))
+            self.postings[int(key)] = np.union1d(recipes, added)
+            touched.add(int(key))
+
+        size = max(int(changed.max()) + 1, len(self.sizes))
+        sizes = np.zeros(size, dtype=self.sizes.dtype)
+        sizes[:len(self.sizes)] = self.sizes
+        sizes[changed] = 0
+        np.add.at(sizes, recipe_ids, 1)
+        self.sizes = sizes
+        self.update_masks(touched)
+
+    def search(self, ingredient_ids, max_missing):
+        """Return recipe ids and missing counts, best coverage first."""
+        with self.lock:
+            self.sync()
+            masks, postings = [], []
+            for ingredient_id in set(ingredient_ids):
+                if ingredient_id in self.masks:
+                    masks.append(self.masks[ingredient_id])
+                elif ingredient_id in self.postings:
+                    postings.append(self.postings[ingredient_id])
+            sizes = self.sizes
+        matched = np.zeros(len(sizes), dtype=sizes.dtype)
+        for mask in masks:
+            matched[:len(mask)] += mask
+        for recipes in postings:
+            matched[recipes] += 1
+        missing = sizes - matched
+        # Newest first within the same number of missing ingredients.
+        recipe_ids = np.flatnonzero(
+            (matched > 0) & (missing <= max_missing)
+        )[::-1]
+        missing = missing[recipe_ids]
+        order = np.argsort(missing, kind='stable')
+        return recipe_ids[order], missing[order]
+
+
+ingredient_index = IngredientIndex()
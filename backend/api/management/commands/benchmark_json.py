@@ -0,0 +1,62 @@
+import json
+import timeit
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import RecipeSerializer
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = ('Compares rendering of a serialized RecipeSerializer page with '
+            'the stdlib JSONRenderer and FastJSONRenderer.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=100,
+                            help='Recipes per page.')
+        parser.add_argument('--number', type=int, default=200,
+                            help='Renders per measurement.')
+
+    def handle(self, *args, **options):
+        recipes = list(
+            Recipe.objects.order_by('-id')[:options['size']]
+        )
+        if not recipes:
+            raise CommandError('There are no recipes to serialize.')
+        request = RequestFactory().get('/api/recipes/')
+        request.user = AnonymousUser()
+        results = RecipeSerializer(
+            recipes, many=True, context={'request': request}
+        ).data
+        while len(results) < options['size']:
+            results += results[:options['size'] - len(results)]
+        page = {
+            'count': len(results),
+            'next': None,
+            'previous': None,
+            'results': results,
+        }
+
+        if orjson is None:
+            self.stdout.write('orjson is not installed, FastJSONRenderer '
+                              'falls back to the stdlib.')
+        stdlib, fast = JSONRenderer(), FastJSONRenderer()
+        rendered = fast.render(page)
+        same = json.loads(stdlib.render(page)) == json.loads(rendered)
+        self.stdout.write(
+            f'Page of {len(results)} recipes, {len(rendered)} bytes, '
+            f'same JSON: {same}'
+        )
+        for name, renderer in (('JSONRenderer', stdlib),
+                               ('FastJSONRenderer', fast)):
+            seconds = min(timeit.repeat(
+                lambda: renderer.render(page),
+                number=options['number'], repeat=3
+            ))
+            self.stdout.write(
+                f'{name}: {seconds / options["number"] * 1000:.3f} ms/page'
+            )
@@ -0,0 +1,100 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ('Measures throughput of a running server and relates it to the '
+            'memory of its gunicorn workers.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('base_url', help='e.g. http://127.0.0.1:8000')
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='API path to request, can be repeated.'
+        )
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--token', help='Token for authenticated calls.')
+        parser.add_argument(
+            '--pid', type=int,
+            help='Gunicorn master pid, used to sum the RSS of its workers.'
+        )
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or [
+            '/api/recipes/?limit=10',
+            '/api/tags/',
+            '/api/ingredients/?name=а',
+        ]
+        urls = [options['base_url'].rstrip('/') + path for path in paths]
+        headers = {}
+        if options['token']:
+            headers['Authorization'] = f'Token {options["token"]}'
+
+        deadline = time.monotonic() + options['duration']
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            results = list(executor.map(
+                lambda number: self.run_client(urls, headers, deadline,
+                                               number),
+                range(options['concurrency'])
+            ))
+
+        completed = sum(done for done, _, _ in results)
+        errors = sum(failed for _, failed, _ in results)
+        latencies = sorted(
+            latency for _, _, client in results for latency in client
+        )
+        throughput = completed / options['duration']
+        self.stdout.write(f'Requests: {completed}, errors: {errors}')
+        self.stdout.write(f'Throughput: {throughput:.1f} req/s')
+        if latencies:
+            median = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[int(len(latencies) * 0.99)] * 1000
+            self.stdout.write(
+                f'Latency: p50 {median:.1f} ms, p99 {p99:.1f} ms'
+            )
+
+        if options['pid']:
+            workers = self.get_worker_rss(options['pid'])
+            memory = sum(workers) / 1024
+            self.stdout.write(
+                f'Workers: {len(workers)}, RSS: {memory:.1f} MB'
+            )
+            if workers:
+                self.stdout.write(
+                    f'Per worker: {throughput / len(workers):.1f} req/s, '
+                    f'per 100 MB: {throughput / memory * 100:.1f} req/s'
+                )
+
+    def run_client(self, urls, headers, deadline, number):
+        session = requests.Session()
+        completed = failed = 0
+        latencies = []
+        while time.monotonic() < deadline:
+            url = urls[(number + completed + failed) % len(urls)]
+            started = time.monotonic()
+            try:
+                response = session.get(url, headers=headers, timeout=30)
+            except requests.RequestException:
+                failed += 1
+                continue
+            if response.status_code >= 400:
+                failed += 1
+                continue
+            latencies.append(time.monotonic() - started)
+            completed += 1
+        return completed, failed, latencies
+
+    def get_worker_rss(self, pid):
+        children = Path(f'/proc/{pid}/task/{pid}/children').read_text()
+        rss = []
+        for child in children.split():
+            status = Path(f'/proc/{child}/status').read_text()
+            for line in status.splitlines():
+                if line.startswith('VmRSS:'):
+                    rss.append(int(line.split()[1]))
+        return rss
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.recommendations import rebuild_author_recommendations
+
+
+class Command(BaseCommand):
+    help = ('Computes similar authors from subscriptions and favorites and '
+            'stores the recommendations of /api/users/recommended/.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        neighbors, recommended = rebuild_author_recommendations()
+        self.stdout.write(
+            f'Stored {neighbors} similar authors and {recommended} '
+            f'recommendations in {time.monotonic() - started:.1f} s'
+        )
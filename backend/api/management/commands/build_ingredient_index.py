@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.ingredient_index import IngredientIndex
+from recipes.models import IngredientIndexChange
+
+
+class Command(BaseCommand):
+    help = ('Builds the ingredient -> recipe index snapshot that workers load '
+            'on startup instead of reading every IngredientInRecipe row.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=settings.INGREDIENT_INDEX_PATH,
+            help='Snapshot file, INGREDIENT_INDEX_PATH by default.'
+        )
+        parser.add_argument(
+            '--prune', action='store_true',
+            help='Delete the change log rows included in the snapshot.'
+        )
+
+    def handle(self, *args, **options):
+        if not options['path']:
+            raise CommandError('Set INGREDIENT_INDEX_PATH or pass --path.')
+        started = time.monotonic()
+        index = IngredientIndex()
+        index.build()
+        index.save(options['path'])
+        self.stdout.write(
+            f'Indexed {len(index.postings)} ingredients of '
+            f'{int((index.sizes > 0).sum())} recipes in '
+            f'{time.monotonic() - started:.1f} s'
+        )
+        if options['prune']:
+            # Skipped ids may still commit and are kept for the workers.
+            deleted, _ = IngredientIndexChange.objects.filter(
+                id__lte=index.last_change_id
+            ).exclude(id__in=list(index.pending)).delete()
+            self.stdout.write(f'Pruned {deleted} changes')
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.similarity import BATCH_SIZE, update_similarity_buckets
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = ('Computes MinHash signatures of all recipes and stores their LSH '
+            'buckets used by /api/recipes/{id}/similar/.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        recipe_ids = Recipe.objects.order_by('id').values_list(
+            'id', flat=True
+        ).iterator(chunk_size=options['batch_size'])
+        indexed = 0
+        batch = []
+        for recipe_id in recipe_ids:
+            batch.append(recipe_id)
+            if len(batch) == options['batch_size']:
+                indexed += update_similarity_buckets(batch)
+                batch = []
+        if batch:
+            indexed += update_similarity_buckets(batch)
+        self.stdout.write(
+            f'Indexed {indexed} recipes in '
+            f'{time.monotonic() - started:.1f} s'
+        )
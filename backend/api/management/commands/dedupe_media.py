@@ -0,0 +1,49 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.deletion import delete_unused_files
+from foodgram.storage import get_file_fields, is_content_addressed
+
+
+class Command(BaseCommand):
+    help = ('Moves media files saved before content-addressed storage to '
+            'names made from their hash, merging identical files.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        fields = get_file_fields(default_storage)
+        renamed = missing = 0
+        for field in fields:
+            names = (
+                field.model._base_manager
+                .exclude(**{field.name: ''})
+                .values_list(field.name, flat=True)
+                .distinct()
+                .order_by(field.name)
+            )
+            for name in names.iterator():
+                if is_content_addressed(name):
+                    continue
+                if not default_storage.exists(name):
+                    self.stderr.write(f'Missing file: {name}')
+                    missing += 1
+                    continue
+                with default_storage.open(name) as old_file:
+                    new_name = default_storage.get_content_name(
+                        name, old_file
+                    )
+                    self.stdout.write(f'{name} -> {new_name}')
+                    if options['dry_run']:
+                        continue
+                    default_storage.save(name, old_file)
+                with transaction.atomic():
+                    for other in fields:
+                        other.model._base_manager.filter(
+                            **{other.name: name}
+                        ).update(**{other.name: new_name})
+                delete_unused_files([name])
+                renamed += 1
+        self.stdout.write(f'Renamed {renamed} files, {missing} missing')
@@ -0,0 +1,98 @@
+import json
+import sys
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from recipes.models import IngredientInRecipe, Recipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Streams recipes with their tags, ingredients and image paths as '
+            'JSON Lines, one recipe per line. Authors, tags and ingredients '
+            'are referenced by username, slug and name, so the file can be '
+            'loaded with import_recipes into another database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='File path or - for stdout.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--from-id', type=int, default=0,
+            help='Export recipes with id >= FROM_ID, to split the export '
+                 'between several processes.'
+        )
+        parser.add_argument('--to-id', type=int,
+                            help='Export recipes with id < TO_ID.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['output'] == '-':
+            exported = self.export(sys.stdout, options)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                exported = self.export(output, options)
+        self.stderr.write(
+            f'Exported {exported} recipes in '
+            f'{time.monotonic() - started:.1f} s'
+        )
+
+    def export(self, output, options):
+        recipes = Recipe.objects.order_by('id').values(
+            'id', 'author_id', 'name', 'image', 'text', 'cooking_time'
+        )
+        if options['to_id'] is not None:
+            recipes = recipes.filter(id__lt=options['to_id'])
+        last_id = options['from_id'] - 1
+        exported = 0
+        while True:
+            # Keyset pagination keeps every batch query cheap and the memory
+            # use bounded by the batch size.
+            batch = list(
+                recipes.filter(id__gt=last_id)[:options['batch_size']]
+            )
+            if not batch:
+                return exported
+            for record in self.get_records(batch):
+                output.write(json.dumps(record, ensure_ascii=False) + '\n')
+            exported += len(batch)
+            last_id = batch[-1]['id']
+
+    def get_records(self, recipes):
+        recipe_ids = [recipe['id'] for recipe in recipes]
+        authors = dict(
+            User.objects
+            .filter(id__in={recipe['author_id'] for recipe in recipes})
+            .values_list('id', 'username')
+        )
+        tags = defaultdict(list)
+        for recipe_id, slug in (
+            Recipe.tags.through.objects
+            .filter(recipe_id__in=recipe_ids)
+            .order_by('id')
+            .values_list('recipe_id', 'tag__slug')
+        ):
+            tags[recipe_id].append(slug)
+        ingredients = defaultdict(list)
+        for recipe_id, name, unit, amount in (
+            IngredientInRecipe.objects
+            .filter(recipe_id__in=recipe_ids)
+            .order_by('id')
+            .values_list('recipe_id', 'ingredient__name',
+                         'ingredient__measurement_unit', 'amount')
+        ):
+            ingredients[recipe_id].append({
+                'name': name, 'measurement_unit': unit, 'amount': amount
+            })
+        for recipe in recipes:
+            yield {
+                'id': recipe['id'],
+                'author': authors[recipe['author_id']],
+                'name': recipe['name'],
+                'image': recipe['image'],
+                'text': recipe['text'],
+                'cooking_time': recipe['cooking_time'],
+                'tags': tags[recipe['id']],
+                'ingredients': ingredients[recipe['id']],
+            }
@@ -0,0 +1,217 @@
+import json
+import time
+from itertools import groupby
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.ingredient_index import log_ingredient_changes
+from api.recipe_ids import invalidate_recipe_ids
+from api.similarity import update_similarity_buckets
+from recipes.models import (ImportCheckpoint, Ingredient, IngredientInRecipe,
+                            Recipe, RecipeScore, Tag)
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Loads recipes written by export_recipes. Every batch is imported '
+            'in its own transaction and recipes get new ids. With '
+            '--chunks N the file can be loaded by N processes at once.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='JSON Lines file.')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--checkpoint',
+            help='Name of a checkpoint kept in the database with the last '
+                 'imported line, saved in the transaction of each batch. An '
+                 'interrupted import started again with the same name resumes '
+                 'after it. With --chunks every chunk has its own checkpoint.'
+        )
+        parser.add_argument(
+            '--chunks', type=int, default=1,
+            help='Number of processes importing the same file.'
+        )
+        parser.add_argument(
+            '--chunk', type=int, default=0,
+            help='Batches imported by this process: those with '
+                 'number %% CHUNKS == CHUNK.'
+        )
+        parser.add_argument(
+            '--default-author',
+            help='Username used for authors missing in this database.'
+        )
+        parser.add_argument(
+            '--id-map',
+            help='Append "old_id new_id" lines to this file. A batch that '
+                 'fails to commit may leave lines behind; the last line of '
+                 'an old id wins.'
+        )
+
+    def handle(self, *args, **options):
+        if not 0 <= options['chunk'] < options['chunks']:
+            raise CommandError('CHUNK must be between 0 and CHUNKS - 1.')
+        self.default_author_id = None
+        if options['default_author']:
+            try:
+                self.default_author_id = User.objects.get(
+                    username=options['default_author']
+                ).id
+            except User.DoesNotExist:
+                raise CommandError(
+                    f'User {options["default_author"]} does not exist.'
+                )
+        checkpoint_name = options['checkpoint']
+        if checkpoint_name and options['chunks'] > 1:
+            checkpoint_name += f':{options["chunk"]}/{options["chunks"]}'
+        checkpoint = self.read_checkpoint(checkpoint_name)
+
+        started = time.monotonic()
+        imported = 0
+        with open(options['input'], encoding='utf-8') as input_file:
+            batches = groupby(
+                enumerate(input_file, 1),
+                key=lambda line: (line[0] - 1) // options['batch_size']
+            )
+            for number, lines in batches:
+                if number % options['chunks'] != options['chunk']:
+                    continue
+                lines = list(lines)
+                last_line = lines[-1][0]
+                if last_line <= checkpoint:
+                    continue
+                records = [
+                    json.loads(line) for line_number, line in lines
+                    if line_number > checkpoint and line.strip()
+                ]
+                with transaction.atomic():
+                    id_map = self.import_batch(records)
+                    if options['id_map']:
+                        with open(options['id_map'], 'a') as id_map_file:
+                            id_map_file.writelines(
+                                f'{old_id} {new_id}\n'
+                                for old_id, new_id in id_map
+                            )
+                    if checkpoint_name:
+                        ImportCheckpoint.objects.update_or_create(
+                            name=checkpoint_name,
+                            defaults={'line': last_line}
+                        )
+                imported += len(id_map)
+        self.stdout.write(
+            f'Imported {imported} recipes in '
+            f'{time.monotonic() - started:.1f} s'
+        )
+
+    def read_checkpoint(self, name):
+        if not name:
+            return 0
+        return ImportCheckpoint.objects.filter(name=name).values_list(
+            'line', flat=True
+        ).first() or 0
+
+    def get_author_ids(self, records):
+        author_ids = dict(
+            User.objects
+            .filter(username__in={record['author'] for record in records})
+            .values_list('username', 'id')
+        )
+        missing = {record['author'] for record in records} - set(author_ids)
+        if missing and self.default_author_id is None:
+            raise CommandError(
+                f'Unknown authors: {", ".join(sorted(missing))}. '
+                'Create them or pass --default-author.'
+            )
+        return {
+            username: author_ids.get(username, self.default_author_id)
+            for username in {record['author'] for record in records}
+        }
+
+    def get_tag_ids(self, records):
+        slugs = {slug for record in records for slug in record['tags']}
+        tag_ids = dict(
+            Tag.objects.filter(slug__in=slugs).values_list('slug', 'id')
+        )
+        if slugs - set(tag_ids):
+            raise CommandError(
+                f'Unknown tags: {", ".join(sorted(slugs - set(tag_ids)))}.'
+            )
+        return tag_ids
+
+    def get_ingredient_ids(self, records):
+        """Map (name, unit) to ingredient ids, creating missing ones.
+
+        Another process may create the same ingredient meanwhile, so
+        conflicts are skipped and the ids are read back afterwards.
+        """
+        keys = {
+            (ingredient['name'], ingredient['measurement_unit'])
+            for record in records for ingredient in record['ingredients']
+        }
+        ingredient_ids = self.find_ingredient_ids(keys)
+        missing = keys - set(ingredient_ids)
+        if missing:
+            Ingredient.objects.bulk_create(
+                (
+                    Ingredient(name=name, measurement_unit=unit)
+                    for name, unit in missing
+                ),
+                ignore_conflicts=True
+            )
+            ingredient_ids.update(self.find_ingredient_ids(missing))
+        return ingredient_ids
+
+    def find_ingredient_ids(self, keys):
+        return {
+            (name, unit): ingredient_id
+            for name, unit, ingredient_id in (
+                Ingredient.objects
+                .filter(name__in={name for name, _ in keys})
+                .values_list('name', 'measurement_unit', 'id')
+            )
+            if (name, unit) in keys
+        }
+
+    def import_batch(self, records):
+        author_ids = self.get_author_ids(records)
+        tag_ids = self.get_tag_ids(records)
+        ingredient_ids = self.get_ingredient_ids(records)
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                author_id=author_ids[record['author']],
+                name=record['name'],
+                image=record['image'],
+                text=record['text'],
+                cooking_time=record['cooking_time'],
+            )
+            for record in records
+        )
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(
+                recipe=recipe,
+                ingredient_id=ingredient_ids[
+                    (ingredient['name'], ingredient['measurement_unit'])
+                ],
+                amount=ingredient['amount'],
+            )
+            for recipe, record in zip(recipes, records)
+            for ingredient in record['ingredients']
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe=recipe, tag_id=tag_ids[slug])
+            for recipe, record in zip(recipes, records)
+            for slug in record['tags']
+        )
+        # bulk_create() does not send post_save, so do what the signal and
+        # RecipeCreateSerializer.create() do for a single recipe.
+        recipe_ids = [recipe.id for recipe in recipes]
+        RecipeScore.objects.bulk_create(
+            RecipeScore(recipe_id=recipe_id) for recipe_id in recipe_ids
+        )
+        log_ingredient_changes(recipe_ids)
+        invalidate_recipe_ids()
+        update_similarity_buckets(recipe_ids)
+        return [
+            (record['id'], recipe.id)
+            for record, recipe in zip(records, recipes)
+        ]
@@ -0,0 +1,92 @@
+import json
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter, so every import and cache starts cold.
+STARTUP_SCRIPT = '''
+import json
+import sys
+import time
+
+started = time.perf_counter()
+import django
+django.setup()
+timings = {'setup': time.perf_counter() - started}
+
+from django.conf import settings
+from django.test import Client
+from foodgram.warmup import warmup
+
+path, warm = sys.argv[1], sys.argv[2] == '1'
+if warm:
+    timings.update(warmup())
+# Requests go through the middleware and async views like in a worker, to a
+# host that passes ALLOWED_HOSTS.
+hosts = [host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*']
+client = Client(SERVER_NAME=hosts[0] if hosts else 'localhost')
+for name in ('first_request', 'second_request'):
+    started = time.perf_counter()
+    response = client.get(path)
+    timings[name] = time.perf_counter() - started
+    if response.status_code >= 400:
+        sys.exit(f'GET {path} returned {response.status_code}')
+print(json.dumps(timings))
+'''
+
+
+class Command(BaseCommand):
+    help = ('Measures process startup: Django setup, each warm-up step and '
+            'the first requests, in fresh interpreters.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--path', default='/api/recipes/')
+        parser.add_argument('--no-warmup', action='store_true',
+                            help='Measure a worker started without warm-up.')
+        parser.add_argument('--json', action='store_true')
+        parser.add_argument(
+            '--max-first-request-ms', type=float,
+            help='Fail if the median first request is slower than this.'
+        )
+
+    def handle(self, *args, **options):
+        runs = [
+            self.run_once(options['path'], not options['no_warmup'])
+            for _ in range(options['repeat'])
+        ]
+        summary = {
+            name: {
+                'median_ms': round(statistics.median(
+                    run[name] for run in runs
+                ) * 1000, 1),
+                'max_ms': round(max(run[name] for run in runs) * 1000, 1),
+            }
+            for name in runs[0]
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(summary, indent=2))
+        else:
+            for name, timing in summary.items():
+                self.stdout.write(
+                    f'{name:<16}{timing["median_ms"]:>10.1f} ms median'
+                    f'{timing["max_ms"]:>10.1f} ms max'
+                )
+        limit = options['max_first_request_ms']
+        if limit is not None and summary['first_request']['median_ms'] > limit:
+            raise CommandError(
+                f'First request took {summary["first_request"]["median_ms"]}'
+                f' ms, more than {limit} ms.'
+            )
+
+    def run_once(self, path, warm):
+        result = subprocess.run(
+            [sys.executable, '-c', STARTUP_SCRIPT, path, '1' if warm else '0'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr)
+        return json.loads(result.stdout.strip().splitlines()[-1])
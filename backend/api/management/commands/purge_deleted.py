@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.deletion import (BATCH_SIZE, find_orphaned_files, purge_recipes,
+                          purge_users)
+from recipes.models import Recipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Deletes recipes and users removed through the API, in small '
+            'batches, together with their images.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Seconds to sleep between batches to limit the load.'
+        )
+        parser.add_argument(
+            '--orphaned-files', action='store_true',
+            help='Also delete files in MEDIA_ROOT that no recipe or user '
+                 'refers to.'
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=24 * 60 * 60,
+            help='Only delete orphaned files older than this, in seconds.'
+        )
+        parser.add_argument('--dry-run', action='store_true',
+                            help='List orphaned files without deleting.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if not options['dry_run']:
+            recipes, files = purge_recipes(options['batch_size'],
+                                           options['pause'])
+            users = purge_users(options['batch_size'], options['pause'])
+            self.stdout.write(
+                f'Purged {recipes} recipes, {users} users and {files} files '
+                f'in {time.monotonic() - started:.1f} s'
+            )
+        if options['orphaned_files'] or options['dry_run']:
+            deleted = 0
+            for field in (Recipe._meta.get_field('image'),
+                          User._meta.get_field('avatar')):
+                for path in find_orphaned_files(field, options['min_age']):
+                    self.stdout.write(path)
+                    if not options['dry_run']:
+                        field.storage.delete(path)
+                        deleted += 1
+            self.stdout.write(f'Deleted {deleted} orphaned files')
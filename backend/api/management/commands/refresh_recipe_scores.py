@@ -0,0 +1,79 @@
+import math
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.recipe_ids import invalidate_recipe_ids
+from recipes.models import Favorite, Recipe, RecipeScore, ShoppingCart
+
+DAY = 24 * 60 * 60
+
+# Every recipe gets a row, so `?ordering=popular|trending` can read the
+# score indexes with an inner join. Each favorite and cart add is weighted by
+# 2 ** (-age / half_life); exponents are clamped because PostgreSQL raises
+# on float underflow.
+REFRESH_SQL = '''
+INSERT INTO {score} (recipe_id, popular, trending, updated_at)
+SELECT recipe.id,
+       COALESCE(SUM(events.weight * EXP(GREATEST(
+           -%(ln2)s * EXTRACT(EPOCH FROM %(now)s - events.created_at)
+           / %(popular_half_life)s, -700))), 0),
+       COALESCE(SUM(events.weight * EXP(GREATEST(
+           -%(ln2)s * EXTRACT(EPOCH FROM %(now)s - events.created_at)
+           / %(trending_half_life)s, -700))), 0),
+       %(now)s
+FROM {recipe} recipe
+LEFT JOIN (
+    SELECT recipe_id, created_at, %(favorite_weight)s AS weight
+    FROM {favorite}
+    UNION ALL
+    SELECT recipe_id, created_at, %(cart_weight)s AS weight
+    FROM {cart}
+) events ON events.recipe_id = recipe.id
+GROUP BY recipe.id
+ON CONFLICT (recipe_id) DO UPDATE SET
+    popular = EXCLUDED.popular,
+    trending = EXCLUDED.trending,
+    updated_at = EXCLUDED.updated_at
+'''
+
+
+class Command(BaseCommand):
+    help = ('Recomputes the time-decayed popular and trending scores of all '
+            'recipes. Meant to run periodically, e.g. from cron.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--popular-half-life', type=float, default=30,
+                            help='Half-life of the popular score, in days.')
+        parser.add_argument('--trending-half-life', type=float, default=3,
+                            help='Half-life of the trending score, in days.')
+        parser.add_argument('--favorite-weight', type=float, default=1)
+        parser.add_argument('--cart-weight', type=float, default=0.5)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        sql = REFRESH_SQL.format(
+            score=RecipeScore._meta.db_table,
+            recipe=Recipe._meta.db_table,
+            favorite=Favorite._meta.db_table,
+            cart=ShoppingCart._meta.db_table,
+        )
+        params = {
+            'ln2': math.log(2),
+            'now': timezone.now(),
+            'popular_half_life': options['popular_half_life'] * DAY,
+            'trending_half_life': options['trending_half_life'] * DAY,
+            'favorite_weight': options['favorite_weight'],
+            'cart_weight': options['cart_weight'],
+        }
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            updated = cursor.rowcount
+            # Lists ordered by the scores change with them.
+            invalidate_recipe_ids()
+        self.stdout.write(
+            f'Updated {updated} recipe scores in '
+            f'{time.monotonic() - started:.1f} s'
+        )
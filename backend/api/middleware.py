@@ -0,0 +1,184 @@
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from api.compression import (choose_encoding, compress_content,
+                             compress_streaming_content, is_compressible)
+from api.profiling import RequestProfile
+from foodgram.routers import REPLICA, use_replica
+
+logger = logging.getLogger(__name__)
+
+
+def get_request_user(request):
+    """The user of a request, authenticated as the API views do.
+
+    Middleware runs before DRF authenticates token requests, so
+    `request.user` is anonymous for them. Returns None for anonymous
+    requests and invalid credentials.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    drf_request = Request(request)
+    for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authentication().authenticate(drf_request)
+        except APIException:
+            return None
+        if result is not None:
+            return result[0]
+    return None
+
+
+class ProfilingMiddleware:
+    query_param = '_profile'
+    header = 'HTTP_X_PROFILE'
+    true_values = {'1', 'true', 'yes', 'on'}
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(self.get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.is_requested(request) or not self.is_staff(request):
+            return self.get_response(request)
+
+        with RequestProfile() as profile:
+            request.profile = profile
+            response = self.get_response(request)
+        return self.get_report_response(request, response, profile)
+
+    async def __acall__(self, request):
+        if (not self.is_requested(request)
+                or not await sync_to_async(self.is_staff)(request)):
+            return await self.get_response(request)
+
+        # Views and ORM calls of the request run on the sync thread, so the
+        # profiler and query wrappers are attached there.
+        profile = RequestProfile()
+        request.profile = profile
+        await sync_to_async(profile.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(profile.__exit__)(None, None, None)
+        return self.get_report_response(request, response, profile)
+
+    def is_requested(self, request):
+        value = request.GET.get(
+            self.query_param, request.META.get(self.header, '')
+        )
+        return value.strip().lower() in self.true_values
+
+    def get_report_response(self, request, response, profile):
+        report = profile.get_report(request, response)
+        logger.info('Profiled %s %s in %.1f ms, %d queries',
+                    request.method, request.path,
+                    report['total_ms'], report['sql']['count'])
+        return JsonResponse(report, json_dumps_params={'ensure_ascii': False})
+
+    def is_staff(self, request):
+        user = get_request_user(request)
+        return user is not None and user.is_staff
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """Route safe requests of replica-enabled views to the read replica.
+
+    After a successful write the client's following reads go to the primary
+    for REPLICA_STICKY_SECONDS, so it always sees its own changes. This is
+    tracked with a short-lived cookie and, for clients that do not keep
+    cookies, per user in the cache.
+    """
+    cookie_name = 'use_primary'
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'cls', view_func)
+        use_replica.set(
+            request.method in ('GET', 'HEAD')
+            and getattr(view, 'read_from_replica', False)
+            and REPLICA in connections.databases
+            and self.cookie_name not in request.COOKIES
+            and not self.is_sticky_user(request)
+        )
+
+    def process_response(self, request, response):
+        use_replica.set(False)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                self.cookie_name, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+            # DRF sets the authenticated user on the Django request.
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                cache.set(self.get_cache_key(user.pk), True,
+                          settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    def is_sticky_user(self, request):
+        user = get_request_user(request)
+        return user is not None and cache.get(self.get_cache_key(user.pk))
+
+    def get_cache_key(self, user_pk):
+        return f'use-primary:{user_pk}'
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress responses with brotli or gzip, as the client accepts.
+
+    Bodies shorter than COMPRESSION_MIN_SIZE are sent as is. Streaming
+    responses are compressed chunk by chunk.
+    """
+
+    def process_response(self, request, response):
+        if (response.has_header('Content-Encoding')
+                or not is_compressible(response)):
+            return response
+        if (not response.streaming
+                and len(response.content) < settings.COMPRESSION_MIN_SIZE):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_streaming_content(
+                response, encoding
+            )
+            del response['Content-Length']
+        else:
+            compressed = compress_content(response, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # The compressed body differs byte for byte from the original.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
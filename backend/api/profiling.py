@@ -0,0 +1,106 @@
+import cProfile
+import pstats
+import time
+from collections import defaultdict
+
+from django.db import connections
+
+TOP_FUNCTIONS = 30
+
+
+class RequestProfile:
+
+    def __init__(self):
+        self.queries = []
+        self.field_timings = defaultdict(lambda: defaultdict(float))
+        self.profiler = cProfile.Profile()
+        self.elapsed = 0
+
+    def __enter__(self):
+        self._wrappers = [
+            connection.execute_wrapper(self.record_query)
+            for connection in connections.all()
+        ]
+        for wrapper in self._wrappers:
+            wrapper.__enter__()
+        self._started = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.disable()
+        self.elapsed = time.perf_counter() - self._started
+        for wrapper in reversed(self._wrappers):
+            wrapper.__exit__(*exc_info)
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'params': repr(params),
+                'ms': (time.perf_counter() - started) * 1000,
+            })
+
+    def add_field_timing(self, serializer, field, seconds):
+        self.field_timings[serializer][field] += seconds
+
+    def get_functions(self):
+        stats = pstats.Stats(self.profiler).sort_stats('cumulative')
+        functions = []
+        for func in stats.fcn_list[:TOP_FUNCTIONS]:
+            calls, total_calls, own_time, cumulative, _ = stats.stats[func]
+            filename, line, name = func
+            functions.append({
+                'function': f'{filename}:{line}({name})',
+                'calls': total_calls,
+                'own_ms': own_time * 1000,
+                'cumulative_ms': cumulative * 1000,
+            })
+        return functions
+
+    def get_sql(self):
+        by_statement = defaultdict(list)
+        for query in self.queries:
+            by_statement[query['sql']].append(query)
+        statements = []
+        for query in self.queries:
+            same_sql = by_statement[query['sql']]
+            statements.append({
+                **query,
+                'similar': len(same_sql),
+                'duplicates': sum(
+                    other['params'] == query['params'] for other in same_sql
+                ),
+            })
+        return {
+            'count': len(self.queries),
+            'total_ms': sum(query['ms'] for query in self.queries),
+            'similar': sum(
+                len(queries) for queries in by_statement.values()
+                if len(queries) > 1
+            ),
+            'statements': statements,
+        }
+
+    def get_report(self, request, response):
+        return {
+            'path': request.get_full_path(),
+            'method': request.method,
+            'status': response.status_code,
+            'total_ms': self.elapsed * 1000,
+            'functions': self.get_functions(),
+            'sql': self.get_sql(),
+            'serializer_fields': {
+                serializer: {
+                    field: seconds * 1000
+                    for field, seconds in sorted(
+                        fields.items(), key=lambda item: -item[1]
+                    )
+                }
+                for serializer, fields in self.field_timings.items()
+            },
+        }
@@ -0,0 +1,52 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+GENERATION_KEY = 'recipe-ids:generation'
+
+
+def get_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Starting from the clock keeps lists cached before the key was
+        # evicted out of reach.
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        pass
+
+
+def invalidate_recipe_ids():
+    """Drop all cached id lists once the current transaction commits."""
+    transaction.on_commit(bump_generation)
+
+
+def get_recipe_ids(state, queryset):
+    """Return `(count, ids)` of a filtered and ordered recipe queryset.
+
+    The first RECIPE_IDS_CACHE_SIZE ids and the total count are cached per
+    normalized filter `state` until recipes or tags change. They are read
+    from the primary, as a lagging replica would cache a stale list for
+    RECIPE_IDS_CACHE_TIMEOUT.
+    """
+    key = 'recipe-ids:{}:{}'.format(
+        get_generation(), hashlib.md5(repr(state).encode()).hexdigest()
+    )
+    cached = cache.get(key)
+    if cached is None:
+        queryset = queryset.using(DEFAULT_DB_ALIAS)
+        size = settings.RECIPE_IDS_CACHE_SIZE
+        ids = list(queryset.values_list('id', flat=True)[:size])
+        count = len(ids) if len(ids) < size else queryset.count()
+        cached = (count, ids)
+        cache.set(key, cached, settings.RECIPE_IDS_CACHE_TIMEOUT)
+    return cached
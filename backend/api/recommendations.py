@@ -0,0 +1,287 @@
+import numpy as np
+from django.db import transaction
+
+from recipes.models import Favorite
+from users.models import (AuthorRecommendation, AuthorSimilarity, Subscribe,
+                          User)
+
+# A favorited recipe is a weaker signal of interest in its author than a
+# subscription.
+FAVORITE_WEIGHT = 0.5
+# Neighbours kept per author and recommendations kept per user.
+NEIGHBORS = 50
+RECOMMENDATIONS = 50
+# Users following more authors than this add little but cost quadratically
+# in the co-follow counts, so only their most recent authors are used.
+MAX_USER_AUTHORS = 500
+BATCH_SIZE = 2000
+# Users whose links are loaded at a time by a full rebuild.
+USER_CHUNK_SIZE = 10000
+# Pairs of links of the same user multiplied at a time: the links of a
+# chunk are split into runs of whole users with about this many pairs.
+MAX_LINK_PAIRS = 2_000_000
+# Author pairs whose co-follow sums are kept between chunks. Past it every
+# author keeps only its PRUNED_NEIGHBORS best pairs so far, which bounds
+# memory at the price of exactness on very large graphs.
+MAX_AUTHOR_PAIRS = 20_000_000
+PRUNED_NEIGHBORS = 10 * NEIGHBORS
+# Seconds a user's recommendations wait before being refreshed after a
+# change, so a burst of follows is handled by one update.
+UPDATE_DELAY = 60
+
+
+def load_interactions(user_ids=None):
+    """Return (users, authors, weights, followed) arrays of the graph.
+
+    A user is linked to every author they follow or whose recipes they
+    favorited; `followed` marks the links that are subscriptions.
+    """
+    subscriptions = Subscribe.objects.filter(
+        user__is_deleted=False, author__is_deleted=False
+    )
+    favorites = Favorite.objects.filter(
+        user__is_deleted=False, recipe__is_deleted=False,
+        recipe__author__is_deleted=False
+    )
+    if user_ids is not None:
+        subscriptions = subscriptions.filter(user_id__in=user_ids)
+        favorites = favorites.filter(user_id__in=user_ids)
+    followed = np.array(
+        subscriptions.order_by('-id').values_list('user_id', 'author_id'),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    favorited = np.array(
+        favorites.order_by('-id').values_list('user_id', 'recipe__author_id'),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    pairs = np.concatenate([followed, favorited])
+    is_followed = np.arange(len(pairs)) < len(followed)
+    # Merge a subscription and favorites of the same author into one link,
+    # keeping links in the order above: subscriptions, then favorites, each
+    # newest first.
+    keys, first, inverse = np.unique(
+        pairs[:, 0] * (pairs[:, 1].max(initial=0) + 1) + pairs[:, 1],
+        return_index=True, return_inverse=True
+    )
+    followed_links = np.bincount(
+        inverse, weights=is_followed, minlength=len(keys)
+    ) > 0
+    favorited_links = np.bincount(
+        inverse, weights=~is_followed, minlength=len(keys)
+    ) > 0
+    weights = followed_links + favorited_links * FAVORITE_WEIGHT
+    order = np.argsort(first, kind='stable')
+    users, authors = pairs[first[order]].T
+    return users, authors, weights[order], followed_links[order]
+
+
+def group_ranks(groups):
+    """Position of every item within its run of equal `groups` values."""
+    if not len(groups):
+        return np.zeros(0, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    lengths = np.diff(np.r_[starts, len(groups)])
+    return np.arange(len(groups)) - np.repeat(starts, lengths)
+
+
+def top_per_group(groups, items, scores, limit):
+    """Keep the `limit` best scored items of every group."""
+    order = np.lexsort((-scores, groups))
+    groups, items, scores = groups[order], items[order], scores[order]
+    keep = group_ranks(groups) < limit
+    return groups[keep], items[keep], scores[keep]
+
+
+def sum_by_key(keys, values):
+    keys, inverse = np.unique(keys, return_inverse=True)
+    return keys, np.bincount(inverse, weights=values, minlength=len(keys))
+
+
+def split_by_pairs(users, max_pairs):
+    """Slices of links grouped by user with about `max_pairs` pairs each.
+
+    Users are not split; a run holds fewer than `max_pairs` pairs plus
+    those of its last user.
+    """
+    if not len(users):
+        return []
+    starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+    lengths = np.diff(np.r_[starts, len(users)])
+    pairs = lengths ** 2
+    runs = np.repeat((np.cumsum(pairs) - pairs) // max_pairs, lengths)
+    bounds = np.flatnonzero(np.r_[True, runs[1:] != runs[:-1], True])
+    return [slice(begin, end) for begin, end in zip(bounds[:-1], bounds[1:])]
+
+
+def get_co_follow_products(users, authors, weights, base):
+    """Entries of M^T M off the diagonal, keyed by `first * base + second`.
+
+    Every pair of authors linked to the same user contributes the product
+    of the two link weights. Links must be grouped by user.
+    """
+    starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+    lengths = np.diff(np.r_[starts, len(users)])
+    # Every link is paired with all links of its user, its own included.
+    per_link = np.repeat(lengths, lengths)
+    left = np.repeat(np.arange(len(users)), per_link)
+    right = (np.repeat(np.repeat(starts, lengths), per_link)
+             + group_ranks(left))
+    pair = authors[left] != authors[right]
+    left, right = left[pair], right[pair]
+    return sum_by_key(authors[left] * base + authors[right],
+                      weights[left] * weights[right])
+
+
+def get_cosine_scores(pair_keys, pair_products, squares, base):
+    first, second = np.divmod(pair_keys, base)
+    norms = np.sqrt(squares)
+    return first, second, pair_products / (norms[first] * norms[second])
+
+
+def get_author_neighbors(chunks, base):
+    """Cosine similarity of authors in the user x author matrix M.
+
+    `chunks` yields the (users, authors, weights) links of disjoint groups
+    of users, and M^T M is summed over them, so only one group of links is
+    in memory at a time; see MAX_LINK_PAIRS and MAX_AUTHOR_PAIRS. Author
+    ids must be below `base`.
+    """
+    pair_keys, pair_products = np.zeros(0, dtype=np.int64), np.zeros(0)
+    squares = np.zeros(base)
+    for users, authors, weights in chunks:
+        order = np.lexsort((np.arange(len(users)), users))
+        users, authors, weights = (users[order], authors[order],
+                                   weights[order])
+        keep = (group_ranks(users) < MAX_USER_AUTHORS) & (authors < base)
+        users, authors, weights = users[keep], authors[keep], weights[keep]
+        squares += np.bincount(authors, weights=weights ** 2,
+                               minlength=base)
+        for run in split_by_pairs(users, MAX_LINK_PAIRS):
+            keys, products = get_co_follow_products(
+                users[run], authors[run], weights[run], base
+            )
+            pair_keys, pair_products = sum_by_key(
+                np.concatenate([pair_keys, keys]),
+                np.concatenate([pair_products, products])
+            )
+        if len(pair_keys) > MAX_AUTHOR_PAIRS:
+            first, _, scores = get_cosine_scores(pair_keys, pair_products,
+                                                 squares, base)
+            _, kept, _ = top_per_group(first, np.arange(len(pair_keys)),
+                                       scores, PRUNED_NEIGHBORS)
+            kept.sort()
+            pair_keys, pair_products = pair_keys[kept], pair_products[kept]
+    first, second, scores = get_cosine_scores(pair_keys, pair_products,
+                                              squares, base)
+    return top_per_group(first, second, scores, NEIGHBORS)
+
+
+def get_recommendations(users, authors, weights, followed, neighbors):
+    """Score authors for every user: M times the neighbour similarities.
+
+    Authors the user already follows, and the user themselves, are left
+    out.
+    """
+    neighbor_authors, neighbor_ids, neighbor_scores = neighbors
+    order = np.argsort(neighbor_authors, kind='stable')
+    neighbor_authors = neighbor_authors[order]
+    neighbor_ids, neighbor_scores = neighbor_ids[order], neighbor_scores[order]
+    starts = np.searchsorted(neighbor_authors, authors, side='left')
+    lengths = np.searchsorted(neighbor_authors, authors, side='right') - starts
+    link = np.repeat(np.arange(len(authors)), lengths)
+    neighbor = np.repeat(starts, lengths) + group_ranks(link)
+
+    base = max(users.max(initial=0), neighbor_ids.max(initial=0)) + 1
+    keys, inverse = np.unique(
+        users[link] * base + neighbor_ids[neighbor], return_inverse=True
+    )
+    scores = np.bincount(
+        inverse, weights=weights[link] * neighbor_scores[neighbor],
+        minlength=len(keys)
+    )
+    candidate_users, candidates = np.divmod(keys, base)
+    keep = ((candidate_users != candidates)
+            & ~np.isin(keys, users[followed] * base + authors[followed]))
+    return top_per_group(candidate_users[keep], candidates[keep],
+                         scores[keep], RECOMMENDATIONS)
+
+
+def save_recommendations(recommendations, user_ids=None):
+    """Replace the recommendations of `user_ids`, or of everybody."""
+    stale = AuthorRecommendation.objects.all()
+    if user_ids is not None:
+        stale = stale.filter(user_id__in=user_ids)
+    with transaction.atomic():
+        stale.delete()
+        AuthorRecommendation.objects.bulk_create(
+            (
+                AuthorRecommendation(user_id=user, author_id=author,
+                                     score=score)
+                for user, author, score in zip(*map(np.ndarray.tolist,
+                                                    recommendations))
+            ),
+            batch_size=BATCH_SIZE
+        )
+    return len(recommendations[0])
+
+
+def rebuild_author_recommendations():
+    """Recompute author neighbours and the recommendations of all users.
+
+    Users are handled USER_CHUNK_SIZE at a time: their links are read once
+    to sum up the neighbours, and again to save their recommendations, each
+    chunk in its own transaction. Returns the number of similar author
+    pairs and of recommendations.
+    """
+    user_ids = np.fromiter(
+        User.objects.order_by('id').values_list('id', flat=True),
+        dtype=np.int64
+    )
+    chunks = [
+        user_ids[start:start + USER_CHUNK_SIZE].tolist()
+        for start in range(0, len(user_ids), USER_CHUNK_SIZE)
+    ]
+    # Authors who sign up meanwhile wait for the next rebuild.
+    neighbors = get_author_neighbors(
+        (load_interactions(chunk)[:3] for chunk in chunks),
+        int(user_ids.max(initial=0)) + 1
+    )
+    with transaction.atomic():
+        AuthorSimilarity.objects.all().delete()
+        AuthorSimilarity.objects.bulk_create(
+            (
+                AuthorSimilarity(author_id=author, similar_author_id=similar,
+                                 score=score)
+                for author, similar, score in zip(*map(np.ndarray.tolist,
+                                                       neighbors))
+            ),
+            batch_size=BATCH_SIZE
+        )
+    recommended = 0
+    for chunk in chunks:
+        users, authors, weights, followed = load_interactions(chunk)
+        recommended += save_recommendations(
+            get_recommendations(users, authors, weights, followed, neighbors),
+            chunk
+        )
+    return len(neighbors[0]), recommended
+
+
+def update_author_recommendations(user_ids):
+    """Refresh the recommendations of some users from stored neighbours.
+
+    Used after a user follows an author or favorites a recipe; the
+    neighbours themselves change slowly and are rebuilt periodically.
+    """
+    users, authors, weights, followed = load_interactions(user_ids)
+    neighbors = np.array(
+        AuthorSimilarity.objects.filter(author_id__in=set(authors.tolist()))
+        .values_list('author_id', 'similar_author_id', 'score'),
+        dtype=np.float64
+    ).reshape(-1, 3)
+    recommendations = get_recommendations(
+        users, authors, weights, followed,
+        (neighbors[:, 0].astype(np.int64), neighbors[:, 1].astype(np.int64),
+         neighbors[:, 2])
+    )
+    return save_recommendations(recommendations, user_ids)
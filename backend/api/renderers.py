@@ -0,0 +1,84 @@
+import math
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_OPTIONS = (
+    orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+)
+
+
+def has_non_finite_floats(data):
+    """Whether NaN or an infinity is anywhere in lists and dicts of `data`."""
+    stack = [(data,)]
+    while stack:
+        container = stack.pop()
+        if isinstance(container, dict):
+            container = container.values()
+        for value in container:
+            value_type = type(value)
+            if value_type is float:
+                if not math.isfinite(value):
+                    return True
+            elif value_type is not str and value_type is not int and (
+                    isinstance(value, (dict, list, tuple))):
+                stack.append(value)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that uses orjson when it is installed.
+
+    The output is the same JSON, not always the same bytes: orjson writes
+    some floats differently (`1e16` instead of `1e+16`). orjson writes NaN
+    and infinities as null, so data containing them is left to the stdlib,
+    which rejects them like JSONRenderer does. Indented output
+    (the browsable API, `; indent=` in Accept) and `ensure_ascii` are left
+    to the stdlib implementation too.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent is not None or self.ensure_ascii:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default,
+                               option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        # orjson writes NaN and infinities as null, so only output with a
+        # null needs the check.
+        if b'null' in ret and has_non_finite_floats(data):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        # Same escaping of U+2028 and U+2029 as JSONRenderer.
+        if b'\xe2\x80' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+                b'\xe2\x80\xa9', b'\\u2029'
+            )
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser that uses orjson for UTF-8 bodies when it is installed."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower() not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -1,12 +1,56 @@
+import time
+from collections import OrderedDict
+
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from drf_base64.fields import Base64ImageField
 from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
 
+from api.ingredient_index import log_ingredient_changes
+from api.tasks import delete_replaced_files, update_similarity
 from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
                             Tag)
 from users.models import User, Subscribe
 
 
+class ProfiledFieldsMixin:
+
+    def to_representation(self, instance):
+        profile = getattr(self.context.get('request'), 'profile', None)
+        if profile is None:
+            return super().to_representation(instance)
+
+        ret = OrderedDict()
+        for field in self._readable_fields:
+            started = time.perf_counter()
+            try:
+                attribute = field.get_attribute(instance)
+            except SkipField:
+                continue
+            if isinstance(attribute, PKOnlyObject):
+                check_for_none = attribute.pk
+            else:
+                check_for_none = attribute
+            if check_for_none is None:
+                ret[field.field_name] = None
+            else:
+                ret[field.field_name] = field.to_representation(attribute)
+            profile.add_field_timing(type(self).__name__, field.field_name,
+                                     time.perf_counter() - started)
+        return ret
+
+
+class SparseFieldsMixin:
+    """Drops the fields that are not listed in the `fields` argument."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+
 class CustomUserCreateSerializer(UserCreateSerializer):
 
     class Meta:
@@ -26,7 +70,7 @@ class CustomUserCreateSerializer(UserCreateSerializer):
         }
 
 
-class CustomUserSerializer(UserSerializer):
+class CustomUserSerializer(SparseFieldsMixin, UserSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta:
@@ -53,7 +97,7 @@ class TagSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Tag
-        fields = '__all__'
+        fields = ('id', 'name', 'slug')
 
 
 class IngredientReadSerializer(serializers.ModelSerializer):
@@ -151,20 +195,29 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(author=author, **validated_data)
         self.set_recipe_tags(recipe, tags)
         self.set_recipe_ingredients(recipe, ingredients)
+        log_ingredient_changes([recipe.id])
+        update_similarity.delay([recipe.id])
 
         return recipe
 
     def update(self, instance, validated_data):
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredients', None)
+        old_image = instance.image.name
         instance = super().update(instance, validated_data)
+        if instance.image.name != old_image:
+            delete_replaced_files.delay([old_image])
 
-        tags = validated_data.pop('tags', None)
         if tags is not None:
             self.set_recipe_tags(instance, tags)
 
-        ingredients = validated_data.pop('ingredients', None)
         if ingredients is not None:
-            instance.ingredients.clear()
+            instance.ingredient_in_recipes.all().delete()
             self.set_recipe_ingredients(instance, ingredients)
+            log_ingredient_changes([instance.id])
+
+        if tags is not None or ingredients is not None:
+            update_similarity.delay([instance.id])
 
         return instance
 
@@ -203,7 +256,8 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         )
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(SparseFieldsMixin, ProfiledFieldsMixin,
+                       serializers.ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
     ingredients = IngredientInRecipeSerializer(
         many=True,
@@ -243,7 +297,8 @@ class RecipeSerializer(serializers.ModelSerializer):
         return False
 
 
-class SubscriptionsSerializer(serializers.ModelSerializer):
+class SubscriptionsSerializer(ProfiledFieldsMixin,
+                              serializers.ModelSerializer):
     recipes = serializers.SerializerMethodField()
     recipes_count = serializers.SerializerMethodField()
     is_subscribed = serializers.SerializerMethodField()
@@ -309,3 +364,10 @@ class AvatarSerializer(serializers.ModelSerializer):
                 {'avatar': 'Avatar cannot be empty'}
             )
         return data
+
+    def update(self, instance, validated_data):
+        old_avatar = instance.avatar.name
+        instance = super().update(instance, validated_data)
+        if old_avatar and instance.avatar.name != old_avatar:
+            delete_replaced_files.delay([old_avatar])
+        return instance
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.authentication import invalidate_token
+from api.ingredient_index import log_ingredient_changes
+from api.recipe_ids import invalidate_recipe_ids
+from recipes.models import (Ingredient, IngredientInRecipe, Recipe,
+                            RecipeScore, Tag)
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    if created:
+        return
+    keys = Token.objects.filter(user=instance).values_list('key', flat=True)
+    for key in keys:
+        invalidate_token(key)
+
+
+@receiver(post_save, sender=Recipe)
+def create_recipe_score(sender, instance, created, **kwargs):
+    if created:
+        RecipeScore.objects.create(recipe=instance)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+def invalidate_cached_recipe_ids(sender, **kwargs):
+    invalidate_recipe_ids()
+
+
+@receiver(post_delete, sender=Recipe)
+def log_deleted_recipe(sender, instance, **kwargs):
+    log_ingredient_changes([instance.id])
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Ingredient)
+def touch_recipes_of_ingredient(sender, instance, created=False, **kwargs):
+    # Recipes change with the ingredients they use. Changes to a recipe's
+    # own ingredient list save the recipe, which touches it already.
+    if created:
+        return
+    Recipe.all_objects.filter(
+        id__in=IngredientInRecipe.objects.filter(ingredient=instance)
+        .values('recipe_id')
+    ).update(updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def touch_recipes_of_tags(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    if action in ('post_add', 'post_remove'):
+        recipe_ids = pk_set if reverse else [instance.id]
+    elif action == 'pre_clear' and reverse:
+        recipe_ids = list(instance.recipe_set.values_list('id', flat=True))
+    elif action == 'post_clear' and not reverse:
+        recipe_ids = [instance.id]
+    else:
+        return
+    Recipe.all_objects.filter(id__in=recipe_ids).update(
+        updated_at=timezone.now()
+    )
+    invalidate_recipe_ids()
@@ -0,0 +1,123 @@
+from functools import reduce
+from operator import or_
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Q
+
+from recipes.models import IngredientInRecipe, Recipe, RecipeBucket
+
+# 16 bands of 4 rows: recipes with Jaccard similarity around 0.5 share a
+# band with probability ~0.6, at 0.8 almost always.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+PRIME = (1 << 31) - 1
+BATCH_SIZE = 2000
+# Candidates sharing the most bands that are compared exactly.
+CANDIDATES = 200
+
+_random = np.random.default_rng(20240501)
+COEFFS_A = _random.integers(1, PRIME, NUM_PERM, dtype=np.uint64)
+COEFFS_B = _random.integers(0, PRIME, NUM_PERM, dtype=np.uint64)
+MIX = np.uint64(1000003)
+
+
+def load_tokens(recipe_ids):
+    """Return (recipe_ids, tokens) arrays of the ingredient and tag sets.
+
+    Ingredients and tags share one token space: even tokens are ingredient
+    ids, odd ones tag ids.
+    """
+    ingredients = np.array(
+        IngredientInRecipe.objects
+        .filter(recipe_id__in=recipe_ids)
+        .values_list('recipe_id', 'ingredient_id'),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    tags = np.array(
+        Recipe.tags.through.objects
+        .filter(recipe_id__in=recipe_ids)
+        .values_list('recipe_id', 'tag_id'),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    recipes = np.concatenate([ingredients[:, 0], tags[:, 0]])
+    tokens = np.concatenate([ingredients[:, 1] * 2, tags[:, 1] * 2 + 1])
+    return recipes, tokens
+
+
+def get_token_sets(recipe_ids):
+    token_sets = {recipe_id: set() for recipe_id in recipe_ids}
+    for recipe_id, token in zip(*map(np.ndarray.tolist,
+                                     load_tokens(recipe_ids))):
+        token_sets[recipe_id].add(token)
+    return token_sets
+
+
+def get_signatures(recipes, tokens):
+    """MinHash signatures of every recipe, one row per recipe."""
+    order = np.argsort(recipes, kind='stable')
+    recipes, tokens = recipes[order], tokens[order]
+    recipe_ids, starts = np.unique(recipes, return_index=True)
+    hashes = (
+        np.outer(tokens.astype(np.uint64) % np.uint64(PRIME), COEFFS_A)
+        + COEFFS_B
+    ) % np.uint64(PRIME)
+    return recipe_ids, np.minimum.reduceat(hashes, starts, axis=0)
+
+
+def get_buckets(signatures):
+    """Hash every band of the signatures into one bucket number."""
+    bands = signatures.reshape(len(signatures), BANDS, ROWS)
+    buckets = np.zeros(bands.shape[:2], dtype=np.uint64)
+    for row in range(ROWS):
+        buckets = buckets * MIX + bands[:, :, row]
+    return buckets.view(np.int64)
+
+
+def update_similarity_buckets(recipe_ids):
+    """Recompute the LSH buckets of a batch of recipes."""
+    recipes, tokens = load_tokens(recipe_ids)
+    objs = []
+    if len(tokens):
+        signed_ids, signatures = get_signatures(recipes, tokens)
+        buckets = get_buckets(signatures).tolist()
+        objs = [
+            RecipeBucket(recipe_id=recipe_id, band=band, bucket=bucket)
+            for recipe_id, recipe_buckets in zip(signed_ids.tolist(), buckets)
+            for band, bucket in enumerate(recipe_buckets)
+        ]
+    with transaction.atomic():
+        RecipeBucket.objects.filter(recipe_id__in=recipe_ids).delete()
+        RecipeBucket.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+    return len(objs) // BANDS
+
+
+def find_similar_recipes(recipe_id, limit):
+    """Return (recipe_id, similarity) pairs, most similar first."""
+    buckets = RecipeBucket.objects.filter(recipe_id=recipe_id).values_list(
+        'band', 'bucket'
+    )
+    if not buckets:
+        return []
+    candidates = list(
+        RecipeBucket.objects
+        .filter(reduce(or_, (Q(band=band, bucket=bucket)
+                             for band, bucket in buckets)))
+        .exclude(recipe_id=recipe_id)
+        .values('recipe_id')
+        .annotate(shared=Count('id'))
+        .order_by('-shared', '-recipe_id')
+        .values_list('recipe_id', flat=True)[:CANDIDATES]
+    )
+    token_sets = get_token_sets([recipe_id] + candidates)
+    target = token_sets.pop(recipe_id)
+    similar = sorted(
+        (
+            (len(target & tokens) / len(target | tokens), candidate)
+            for candidate, tokens in token_sets.items()
+            if target & tokens
+        ),
+        reverse=True
+    )
+    return [(candidate, score) for score, candidate in similar[:limit]]
@@ -0,0 +1,37 @@
+from django.core.management import call_command
+
+from api.deletion import delete_unused_files, purge_recipes, purge_users
+from api.recommendations import update_author_recommendations
+from api.similarity import update_similarity_buckets
+from jobs.queue import job
+
+
+@job(queue='maintenance')
+def purge_deleted():
+    purge_recipes()
+    purge_users()
+
+
+@job(queue='maintenance')
+def delete_replaced_files(names):
+    delete_unused_files(names)
+
+
+@job(queue='maintenance')
+def refresh_recipe_scores():
+    call_command('refresh_recipe_scores')
+
+
+@job()
+def update_similarity(recipe_ids):
+    update_similarity_buckets(recipe_ids)
+
+
+@job(queue='maintenance')
+def rebuild_author_recommendations():
+    call_command('build_author_recommendations')
+
+
+@job()
+def update_recommendations(user_ids):
+    update_author_recommendations(user_ids)
@@ -0,0 +1,46 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import local_tokens, token_cache_key
+from users.models import User
+
+
+class CachedTokenAuthenticationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_tokens.clear()
+        self.user = User.objects.create(
+            username='reader', email='reader@example.com'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+        # A replica does not see the data of the test transaction.
+        self.client.cookies['use_primary'] = '1'
+
+    def get_me(self):
+        return self.client.get('/api/users/me/').status_code
+
+    def test_deleted_token_is_rejected(self):
+        self.assertEqual(self.get_me(), 200)
+        self.token.delete()
+        self.assertEqual(self.get_me(), 401)
+
+    def test_token_deleted_elsewhere_is_rejected_after_local_timeout(self):
+        self.assertEqual(self.get_me(), 200)
+        self.assertIsNone(cache.get(token_cache_key(self.token.key)))
+        # Another process deletes the token: no signal reaches this one.
+        Token.objects.filter(pk=self.token.pk)._raw_delete('default')
+        local_tokens.clear()
+        self.assertEqual(self.get_me(), 401)
+
+    @override_settings(TOKEN_CACHE=True)
+    def test_shared_cache_keeps_lookups(self):
+        self.assertEqual(self.get_me(), 200)
+        self.assertEqual(cache.get(token_cache_key(self.token.key)),
+                         self.user)
+        self.token.delete()
+        self.assertEqual(self.get_me(), 401)
@@ -0,0 +1,27 @@
+import gzip
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import SimpleTestCase
+
+from api.compression import compress_content
+
+
+class CompressContentTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def response(self, body):
+        response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = '"same-version"'
+        return response
+
+    def test_changed_body_with_same_etag_is_compressed_again(self):
+        old = b'{"name": "Sole", "unit": "g"}' * 40
+        new = b'{"name": "Salt", "unit": "g"}' * 40
+        self.assertEqual(len(old), len(new))
+        for body in (old, new, old):
+            with self.subTest(body=body[:20]):
+                compressed = compress_content(self.response(body), 'gzip')
+                self.assertEqual(gzip.decompress(compressed), body)
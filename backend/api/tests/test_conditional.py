@@ -0,0 +1,51 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, IngredientInRecipe, Recipe
+from users.models import User
+
+
+class RecipeVersionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(
+            username='cook', email='cook@example.com'
+        )
+        cls.salt = Ingredient.objects.create(
+            name='Соль', measurement_unit='г'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=author, name='Суп', text='Сварить', cooking_time=30,
+            image='recipes/images/soup.png'
+        )
+        IngredientInRecipe.objects.create(
+            recipe=cls.recipe, ingredient=cls.salt, amount=5
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        # A replica does not see the data of the test transaction.
+        self.client.cookies['use_primary'] = '1'
+
+    def get_changed(self, url, change):
+        etag = self.client.get(url)['ETag']
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response.json()
+
+    def test_ingredient_change_changes_recipe_version(self):
+        for url in (f'/api/recipes/{self.recipe.id}/', '/api/recipes/'):
+            with self.subTest(url=url):
+                self.salt.measurement_unit += 'р'
+                self.get_changed(url, self.salt.save)
+
+    def test_ingredient_deletion_changes_recipe_version(self):
+        data = self.get_changed(
+            f'/api/recipes/{self.recipe.id}/', self.salt.delete
+        )
+        self.assertEqual(data['ingredients'], [])
@@ -0,0 +1,26 @@
+from django.db import connection
+from django.test import TestCase
+
+from foodgram.postgresql.base import DatabaseWrapper, pools
+
+
+class ConnectionPoolTests(TestCase):
+
+    def test_request_end_returns_connection_to_pool(self):
+        pooled = DatabaseWrapper(
+            {**connection.settings_dict, 'POOL_SIZE': 1,
+             'CONN_MAX_AGE': 60},
+            alias='pooled'
+        )
+        pool = pooled.get_pool()
+        try:
+            pooled.ensure_connection()
+            self.assertEqual(pool.in_use, 1)
+            pooled.close_if_unusable_or_obsolete()
+            self.assertIsNone(pooled.connection)
+            self.assertEqual((pool.in_use, pool.size), (0, 1))
+        finally:
+            pooled.close()
+            for key in [key for key in pools if key[0] == 'pooled']:
+                for idle in pools.pop(key)._idle:
+                    idle.close()
@@ -0,0 +1,33 @@
+from django.test import TestCase
+
+from api.deletion import hide_recipes, purge_recipes
+from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
+                            Tag)
+from users.models import User
+
+
+class PurgeRecipesTests(TestCase):
+
+    def test_purges_recipe_with_all_its_rows(self):
+        author = User.objects.create(
+            username='cook', email='cook@example.com'
+        )
+        salt = Ingredient.objects.create(name='Соль', measurement_unit='г')
+        recipe = Recipe.objects.create(
+            author=author, name='Суп', text='Сварить', cooking_time=30,
+            image='recipes/images/soup.png'
+        )
+        recipe.tags.add(Tag.objects.create(name='Обед', slug='lunch'))
+        recipe.ingredients.add(salt)
+        IngredientInRecipe.objects.create(
+            recipe=recipe, ingredient=salt, amount=5
+        )
+        Favorite.objects.create(user=author, recipe=recipe)
+        hide_recipes([recipe.id])
+
+        purged, _ = purge_recipes()
+
+        self.assertEqual(purged, 1)
+        self.assertFalse(Recipe.all_objects.filter(id=recipe.id).exists())
+        self.assertFalse(Recipe.ingredients.through.objects.exists())
+        self.assertTrue(Ingredient.objects.filter(id=salt.id).exists())
@@ -0,0 +1,196 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.serializers import (CustomUserSerializer, RecipeSerializer,
+                             SubscriptionsSerializer)
+from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
+                            ShoppingCart, Tag)
+from users.models import Subscribe, User
+
+
+class FastSerializerContractTests(TestCase):
+    """The values-based list serializers render what the model ones do."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create(
+            username='reader', email='reader@example.com',
+            first_name='Анна', last_name='Иванова'
+        )
+        cls.token = Token.objects.create(user=cls.reader)
+        breakfast = Tag.objects.create(name='Завтрак', slug='breakfast')
+        dinner = Tag.objects.create(name='Ужин', slug='dinner')
+        salt = Ingredient.objects.create(name='Соль', measurement_unit='г')
+        milk = Ingredient.objects.create(name='Молоко', measurement_unit='мл')
+        cls.authors = [
+            User.objects.create(
+                username=f'author{number}',
+                email=f'author{number}@example.com',
+                first_name='Повар', last_name=str(number),
+                avatar='users/avatar.png' if number % 2 else ''
+            )
+            for number in range(3)
+        ]
+        recipes = []
+        for number, author in enumerate(cls.authors[:2]):
+            for position in range(3):
+                recipe = Recipe.objects.create(
+                    author=author, name=f'Рецепт {number}.{position}',
+                    text='Приготовить', cooking_time=10 + position,
+                    image=f'recipes/images/{number}-{position}.png'
+                )
+                recipe.tags.add(breakfast, *([dinner] if position else []))
+                IngredientInRecipe.objects.create(
+                    recipe=recipe, ingredient=salt, amount=position + 1
+                )
+                IngredientInRecipe.objects.create(
+                    recipe=recipe, ingredient=milk, amount=200
+                )
+                recipes.append(recipe)
+        Recipe.objects.create(
+            author=cls.authors[0], name='Удалённый', text='-',
+            cooking_time=1, image='recipes/images/deleted.png',
+            is_deleted=True
+        )
+        for author in cls.authors:
+            Subscribe.objects.create(user=cls.reader, author=author)
+        Subscribe.objects.create(user=cls.authors[1], author=cls.authors[0])
+        Favorite.objects.create(user=cls.reader, recipe=recipes[0])
+        ShoppingCart.objects.create(user=cls.reader, recipe=recipes[4])
+
+    def setUp(self):
+        cache.clear()
+        self.anonymous = APIClient()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+        # A replica does not see the data of the test transaction.
+        for client in (self.anonymous, self.client):
+            client.cookies['use_primary'] = '1'
+
+    def get(self, client, url):
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), response.renderer_context['request']
+
+    def render(self, serializer_class, instances, request, fields=None):
+        kwargs = {} if fields is None else {'fields': fields}
+        data = serializer_class(
+            instances, many=True, context={'request': request}, **kwargs
+        ).data
+        return json.loads(JSONRenderer().render(data))
+
+    def only(self, items, fields):
+        return [{field: item[field] for field in fields} for item in items]
+
+    def assert_recipes_match(self, client, query='', fields=None):
+        data, request = self.get(client, f'/api/recipes/{query}')
+        self.assertTrue(data['results'])
+        recipes = Recipe.objects.in_bulk(
+            [recipe['id'] for recipe in data['results']]
+        )
+        expected = self.render(
+            RecipeSerializer,
+            [recipes[recipe['id']] for recipe in data['results']],
+            request, fields
+        )
+        self.assertEqual(data['results'], expected)
+
+    def test_recipes(self):
+        for client in (self.anonymous, self.client):
+            with self.subTest(authenticated=client is self.client):
+                self.assert_recipes_match(client)
+                self.assert_recipes_match(
+                    client, '?fields=id,author,is_favorited',
+                    ('id', 'author', 'is_favorited')
+                )
+                self.assert_recipes_match(
+                    client, '?omit=ingredients,text,is_in_shopping_cart',
+                    ('id', 'tags', 'author', 'is_favorited', 'name', 'image',
+                     'cooking_time')
+                )
+
+    def test_recipe_flags(self):
+        data, _ = self.get(self.client, '/api/recipes/?limit=100')
+        self.assertEqual(
+            sum(recipe['is_favorited'] for recipe in data['results']), 1
+        )
+        self.assertEqual(
+            sum(recipe['is_in_shopping_cart'] for recipe in data['results']),
+            1
+        )
+
+    def assert_users_match(self, client, query='', fields=None):
+        data, request = self.get(client, f'/api/users/{query}')
+        users = User.objects.in_bulk([user['id'] for user in data['results']])
+        expected = self.render(
+            CustomUserSerializer,
+            [users[user['id']] for user in data['results']],
+            request, fields
+        )
+        self.assertEqual(data['results'], expected)
+        return data['results']
+
+    def test_users(self):
+        for client in (self.anonymous, self.client):
+            with self.subTest(authenticated=client is self.client):
+                self.assert_users_match(client)
+                self.assert_users_match(
+                    client, '?fields=id,is_subscribed', ('id', 'is_subscribed')
+                )
+                self.assert_users_match(
+                    client, '?omit=email,avatar',
+                    ('id', 'username', 'first_name', 'last_name',
+                     'is_subscribed')
+                )
+        users = self.assert_users_match(self.client)
+        self.assertEqual(
+            sum(user['is_subscribed'] for user in users), len(self.authors)
+        )
+
+    def assert_subscriptions_match(self, query='', fields=None):
+        data, request = self.get(
+            self.client, f'/api/users/subscriptions/{query}'
+        )
+        self.assertEqual(len(data['results']), len(self.authors))
+        users = User.objects.in_bulk([user['id'] for user in data['results']])
+        expected = self.render(
+            SubscriptionsSerializer,
+            [users[user['id']] for user in data['results']],
+            request
+        )
+        if fields is not None:
+            expected = self.only(expected, fields)
+        self.assertEqual(data['results'], expected)
+        return data['results']
+
+    def test_subscriptions(self):
+        subscriptions = self.assert_subscriptions_match()
+        self.assertEqual(
+            sorted(user['recipes_count'] for user in subscriptions), [0, 3, 3]
+        )
+        for limit in (0, 2, 5):
+            with self.subTest(recipes_limit=limit):
+                subscriptions = self.assert_subscriptions_match(
+                    f'?recipes_limit={limit}'
+                )
+                self.assertEqual(
+                    max(len(user['recipes']) for user in subscriptions),
+                    min(limit, 3)
+                )
+        self.assert_subscriptions_match(
+            '?recipes_limit=1&fields=id,recipes,recipes_count',
+            ('id', 'recipes', 'recipes_count')
+        )
+        self.assert_subscriptions_match(
+            '?fields=id,recipes_count', ('id', 'recipes_count')
+        )
+        self.assert_subscriptions_match(
+            '?omit=recipes,email',
+            ('id', 'username', 'first_name', 'last_name', 'is_subscribed',
+             'recipes_count', 'avatar')
+        )
@@ -0,0 +1,51 @@
+from django.test import TestCase
+
+from api.ingredient_index import IngredientIndex
+from recipes.models import (Ingredient, IngredientIndexChange,
+                            IngredientInRecipe, Recipe)
+from users.models import User
+
+
+class IngredientIndexSyncTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(
+            username='cook', email='cook@example.com'
+        )
+        cls.salt = Ingredient.objects.create(
+            name='Соль', measurement_unit='г'
+        )
+
+    def create_recipe(self, change_id):
+        recipe = Recipe.objects.create(
+            author=self.author, name='Суп', text='Сварить', cooking_time=30,
+            image='recipes/images/soup.png'
+        )
+        IngredientInRecipe.objects.create(
+            recipe=recipe, ingredient=self.salt, amount=5
+        )
+        IngredientIndexChange.objects.create(
+            id=change_id, recipe_id=recipe.id
+        )
+        return recipe
+
+    def search(self, index):
+        recipe_ids, _ = index.search([self.salt.id], 0)
+        return set(recipe_ids.tolist())
+
+    def test_change_committed_after_a_later_one_is_applied(self):
+        first = self.create_recipe(1)
+        index = IngredientIndex()
+        index.sync()
+        self.assertEqual(self.search(index), {first.id})
+
+        # Change 2 is still in flight when change 3 becomes visible.
+        third = self.create_recipe(3)
+        self.assertEqual(self.search(index), {first.id, third.id})
+        self.assertEqual(set(index.pending), {2})
+
+        second = self.create_recipe(2)
+        self.assertEqual(self.search(index),
+                         {first.id, second.id, third.id})
+        self.assertEqual(index.pending, {})
@@ -0,0 +1,59 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.fast_serializers import (RecipeListSerializer,
+                                  SubscriptionListSerializer,
+                                  UserListSerializer)
+from recipes.models import Recipe
+from users.models import Subscribe, User
+
+
+class ProfilingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create(
+            username='admin', email='admin@example.com', is_staff=True
+        )
+        cls.token = Token.objects.create(user=cls.staff)
+        author = User.objects.create(
+            username='cook', email='cook@example.com'
+        )
+        Recipe.objects.create(
+            author=author, name='Суп', text='Сварить', cooking_time=30,
+            image='recipes/images/soup.png'
+        )
+        Subscribe.objects.create(user=cls.staff, author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+        # A replica does not see the data of the test transaction.
+        self.client.cookies['use_primary'] = '1'
+
+    def get_field_timings(self, url):
+        separator = '&' if '?' in url else '?'
+        response = self.client.get(f'{url}{separator}_profile=1')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['serializer_fields']
+
+    def test_values_serializers_report_field_timings(self):
+        for url, serializer in (
+            ('/api/recipes/', RecipeListSerializer),
+            ('/api/users/', UserListSerializer),
+            ('/api/users/subscriptions/', SubscriptionListSerializer),
+        ):
+            with self.subTest(url=url):
+                timings = self.get_field_timings(url)
+                self.assertEqual(
+                    set(timings[serializer.__name__]),
+                    set(serializer.Meta.fields)
+                )
+
+    def test_sparse_fields_report_requested_fields(self):
+        timings = self.get_field_timings('/api/recipes/?fields=id,tags')
+        self.assertEqual(set(timings['RecipeListSerializer']),
+                         {'id', 'tags'})
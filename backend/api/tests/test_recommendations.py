@@ -0,0 +1,104 @@
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from api.recommendations import (get_author_neighbors, get_recommendations,
+                                 split_by_pairs)
+
+# Users 1-3 by authors 10-12, link weights:
+#         10   11   12
+#    1     1    1    .
+#    2     1   .5    1
+#    3     .   .5    1
+USERS = np.array([1, 1, 2, 2, 2, 3, 3])
+AUTHORS = np.array([10, 11, 10, 11, 12, 11, 12])
+WEIGHTS = np.array([1, 1, 1, .5, 1, .5, 1])
+# Column norms: 10 -> sqrt(2), 11 -> sqrt(1.5), 12 -> sqrt(2).
+SQRT3 = np.sqrt(3)
+SIMILARITIES = {
+    (10, 11): 1.5 / SQRT3,
+    (10, 12): .5,
+    (11, 12): 1 / SQRT3,
+}
+BASE = 13
+
+
+def as_dict(groups, items, scores):
+    return {
+        (group, item): score
+        for group, item, score in zip(groups.tolist(), items.tolist(),
+                                      scores.tolist())
+    }
+
+
+class AuthorNeighborsTests(SimpleTestCase):
+
+    def chunks(self, *user_groups):
+        for group in user_groups:
+            link = np.isin(USERS, group)
+            yield USERS[link], AUTHORS[link], WEIGHTS[link]
+
+    def assert_similarities(self, neighbors, expected):
+        neighbors = as_dict(*neighbors)
+        self.assertEqual(set(neighbors), set(expected))
+        for pair, score in expected.items():
+            self.assertAlmostEqual(neighbors[pair], score, msg=pair)
+
+    def test_cosine_similarities(self):
+        expected = {
+            **SIMILARITIES,
+            **{(second, first): score
+               for (first, second), score in SIMILARITIES.items()},
+        }
+        self.assert_similarities(
+            get_author_neighbors(self.chunks([1, 2, 3]), BASE), expected
+        )
+        with mock.patch('api.recommendations.MAX_LINK_PAIRS', 1), \
+                mock.patch('api.recommendations.MAX_AUTHOR_PAIRS', 1), \
+                mock.patch('api.recommendations.PRUNED_NEIGHBORS', 2):
+            self.assert_similarities(
+                get_author_neighbors(self.chunks([1], [3, 2]), BASE),
+                expected
+            )
+
+    @mock.patch('api.recommendations.NEIGHBORS', 1)
+    def test_top_neighbors(self):
+        self.assert_similarities(
+            get_author_neighbors(self.chunks([1, 2, 3]), BASE),
+            {(10, 11): 1.5 / SQRT3, (11, 10): 1.5 / SQRT3,
+             (12, 11): 1 / SQRT3}
+        )
+
+    def test_split_by_pairs(self):
+        users = np.array([1, 1, 1, 2, 3, 3])
+        self.assertEqual(split_by_pairs(users, 100), [slice(0, 6)])
+        self.assertEqual(split_by_pairs(users, 10),
+                         [slice(0, 4), slice(4, 6)])
+        self.assertEqual(split_by_pairs(users, 1),
+                         [slice(0, 3), slice(3, 4), slice(4, 6)])
+        self.assertEqual(split_by_pairs(users[:0], 1), [])
+
+
+class RecommendationsTests(SimpleTestCase):
+
+    def test_scores_unfollowed_authors(self):
+        neighbors = get_author_neighbors(
+            [(USERS, AUTHORS, WEIGHTS)], BASE
+        )
+        # User 1 follows 10 and 11; user 3 follows 12 and favorited 11.
+        followed = np.array([True, True, False, False, False, False, True])
+        recommendations = as_dict(*get_recommendations(
+            USERS, AUTHORS, WEIGHTS, followed, neighbors
+        ))
+        expected = {
+            (1, 12): SIMILARITIES[10, 12] + SIMILARITIES[11, 12],
+            (2, 10): .5 * SIMILARITIES[10, 11] + SIMILARITIES[10, 12],
+            (2, 11): SIMILARITIES[10, 11] + SIMILARITIES[11, 12],
+            (2, 12): SIMILARITIES[10, 12] + .5 * SIMILARITIES[11, 12],
+            (3, 10): .5 * SIMILARITIES[10, 11] + SIMILARITIES[10, 12],
+            (3, 11): SIMILARITIES[11, 12],
+        }
+        self.assertEqual(set(recommendations), set(expected))
+        for pair, score in expected.items():
+            self.assertAlmostEqual(recommendations[pair], score, msg=pair)
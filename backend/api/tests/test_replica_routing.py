@@ -0,0 +1,79 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from foodgram.routers import REPLICA
+from recipes.models import Recipe, Tag
+from users.models import User
+
+
+@skipUnless(REPLICA in settings.DATABASES,
+            'Set DB_REPLICA_HOST to run the replica routing tests.')
+class ReplicaRoutingTests(TestCase):
+    databases = {'default'} | ({REPLICA} & set(settings.DATABASES))
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='reader', email='reader@example.com'
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        cls.recipe = Recipe.objects.create(
+            author=cls.user, name='Каша', text='Сварить', cooking_time=10,
+            image='recipes/kasha.png'
+        )
+        cls.recipe.tags.add(Tag.objects.create(name='Завтрак',
+                                               slug='breakfast'))
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def get_recipes(self):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = self.client.get('/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+        return len(primary), len(replica)
+
+    def add_favorite(self):
+        response = self.client.post(
+            f'/api/recipes/{self.recipe.id}/favorite/'
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_reads_go_to_replica(self):
+        primary, replica = self.get_recipes()
+        self.assertGreater(replica, 0)
+
+    def test_reads_after_write_go_to_primary_with_cookie(self):
+        self.add_favorite()
+        self.assertIn('use_primary', self.client.cookies)
+        primary, replica = self.get_recipes()
+        self.assertEqual(replica, 0)
+        self.assertGreater(primary, 0)
+
+    def test_reads_after_write_go_to_primary_without_cookies(self):
+        self.add_favorite()
+        self.client.cookies.clear()
+        primary, replica = self.get_recipes()
+        self.assertEqual(replica, 0)
+        self.assertGreater(primary, 0)
+
+    def test_other_users_still_read_from_replica(self):
+        self.add_favorite()
+        self.client = APIClient()
+        primary, replica = self.get_recipes()
+        self.assertGreater(replica, 0)
+
+    def test_writes_go_to_primary(self):
+        with CaptureQueriesContext(connections[REPLICA]) as replica:
+            self.add_favorite()
+        self.assertEqual(len(replica), 0)
@@ -0,0 +1,70 @@
+from unittest import mock
+
+import numpy as np
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from users.models import User
+
+
+class RecipeActionFieldsTests(TestCase):
+    """Actions that look recipes up by id work without `id` in the output."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(
+            username='cook', email='cook@example.com'
+        )
+        cls.recipes = [
+            Recipe.objects.create(
+                author=author, name=f'Рецепт {number}', text='Приготовить',
+                cooking_time=10, image=f'recipes/images/{number}.png'
+            )
+            for number in range(2)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        # A replica does not see the data of the test transaction.
+        self.client.cookies['use_primary'] = '1'
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_ids_without_id_field(self):
+        first, second = (recipe.id for recipe in self.recipes)
+        missing = second + 100
+        for query in ('fields=name', 'omit=id'):
+            with self.subTest(query=query):
+                data = self.get(
+                    f'/api/recipes/?ids={second},{missing},{first}&{query}'
+                )
+                self.assertEqual(
+                    [recipe['name'] for recipe in data['results']],
+                    ['Рецепт 1', 'Рецепт 0']
+                )
+                self.assertNotIn('id', data['results'][0])
+                self.assertEqual(data['missing'], [missing])
+
+    def test_cookable_without_id_field(self):
+        first, second = (recipe.id for recipe in self.recipes)
+        found = (np.array([second, first]), np.array([0, 2]))
+        with mock.patch('api.views.ingredient_index.search',
+                        return_value=found):
+            data = self.get('/api/recipes/cookable/?ingredients=1&fields=name')
+        self.assertEqual(data['results'], [
+            {'name': 'Рецепт 1', 'missing_ingredients': 0},
+            {'name': 'Рецепт 0', 'missing_ingredients': 2},
+        ])
+
+    def test_similar_without_id_field(self):
+        first, second = (recipe.id for recipe in self.recipes)
+        with mock.patch('api.views.find_similar_recipes',
+                        return_value=[(first, 0.5)]):
+            data = self.get(f'/api/recipes/{second}/similar/?fields=name')
+        self.assertEqual(data, [{'name': 'Рецепт 0', 'similarity': 0.5}])
@@ -0,0 +1,69 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from rest_framework.test import APIRequestFactory
+
+from api.throttling import SlidingWindowThrottle, parse_rate
+
+
+class ParseRateTests(SimpleTestCase):
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('10/s'), (10, 1))
+        self.assertEqual(parse_rate('100/min'), (100, 60))
+        self.assertEqual(parse_rate('30/hour'), (30, 3600))
+        self.assertEqual(parse_rate('5/day'), (5, 86400))
+
+
+class SlidingWindowWaitTests(SimpleTestCase):
+
+    def throttle(self, current, previous, elapsed, num_requests=10,
+                 duration=60):
+        throttle = SlidingWindowThrottle()
+        throttle.num_requests, throttle.duration = num_requests, duration
+        throttle.current, throttle.previous = current, previous
+        throttle.elapsed = elapsed
+        return throttle
+
+    def test_wait_for_previous_window_to_slide_out(self):
+        # 12 * 0.75 + 4 + 1 > 10; at 35 s: 12 * 25 / 60 + 4 + 1 == 10.
+        self.assertAlmostEqual(self.throttle(4, 12, 15).wait(), 20)
+
+    def test_wait_for_next_window(self):
+        # Next window at 6 s: 10 * 0.9 + 1 == 10.
+        self.assertAlmostEqual(self.throttle(10, 0, 30).wait(), 36)
+        self.assertAlmostEqual(self.throttle(10, 7, 30).wait(), 36)
+
+
+class View:
+    throttle_scope = 'search'
+
+
+class SlidingWindowThrottleTests(SimpleTestCase):
+    """The request after `wait()` seconds is the first one allowed."""
+
+    def setUp(self):
+        cache.clear()
+        self.request = APIRequestFactory().get('/', REMOTE_ADDR='10.0.0.1')
+
+    def allow(self, now):
+        with mock.patch('api.throttling.time.time', return_value=now):
+            throttle = SlidingWindowThrottle()
+            return throttle, throttle.allow_request(self.request, View())
+
+    def assert_wait(self, now):
+        throttle, allowed = self.allow(now)
+        while allowed:
+            throttle, allowed = self.allow(now)
+        retry_at = now + throttle.wait()
+        self.assertFalse(self.allow(retry_at - 0.5)[1])
+        self.assertTrue(self.allow(retry_at + 0.01)[1])
+
+    def test_wait_for_next_window(self):
+        self.assert_wait(600 * 60 + 30)
+
+    def test_wait_for_previous_window_to_slide_out(self):
+        for _ in range(40):
+            self.assertTrue(self.allow(600 * 60 + 30)[1])
+        self.assert_wait(601 * 60 + 10)
@@ -0,0 +1,95 @@
+import time
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+def parse_rate(rate):
+    """'100/min' -> (100, 60)."""
+    num, period = rate.split('/')
+    return int(num), {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Scoped rate limit over a sliding window kept in the cache.
+
+    The scope comes from the view: `get_throttle_scope()`, the
+    `throttle_scopes` mapping of action to scope, or `throttle_scope`.
+    Views without a scope, and scopes without a rate in
+    DEFAULT_THROTTLE_RATES, are not limited.
+
+    Requests are counted per fixed window with an atomic `cache.incr()`;
+    the previous window's count is weighted by how much of it still falls
+    into the sliding window. A check costs two cache round trips. The
+    counts are only shared by the processes with a shared cache
+    (SHARED_CACHE); with a per-process one every process allows the full
+    rate, and `check --deploy` warns about it.
+    """
+    cache = cache
+    rate_suffix = ''
+
+    def get_scope(self, view):
+        if hasattr(view, 'get_throttle_scope'):
+            return view.get_throttle_scope()
+        scopes = getattr(view, 'throttle_scopes', {})
+        return scopes.get(getattr(view, 'action', None),
+                          getattr(view, 'throttle_scope', None))
+
+    def get_cache_ident(self, request):
+        return self.get_ident(request)
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(
+            f'{scope}{self.rate_suffix}'
+        ) if scope else None
+        if rate is None:
+            return True
+        self.num_requests, self.duration = parse_rate(rate)
+        now = time.time()
+        window, self.elapsed = divmod(now, self.duration)
+        prefix = (f'throttle:{scope}{self.rate_suffix}:'
+                  f'{self.get_cache_ident(request)}:')
+        key = f'{prefix}{int(window)}'
+        try:
+            self.current = self.cache.incr(key)
+        except ValueError:
+            if self.cache.add(key, 1, self.duration * 2):
+                self.current = 1
+            else:
+                self.current = self.cache.incr(key)
+        self.previous = self.cache.get(f'{prefix}{int(window) - 1}', 0)
+        weight = 1 - self.elapsed / self.duration
+        if self.previous * weight + self.current <= self.num_requests:
+            return True
+        # Rejected requests do not count against the client.
+        self.cache.decr(key)
+        self.current -= 1
+        return False
+
+    def wait(self):
+        if self.current < self.num_requests:
+            # Wait until enough of the previous window has slid out.
+            free = self.num_requests - self.current - 1
+            return max(
+                (1 - free / self.previous) * self.duration - self.elapsed, 0
+            )
+        # Wait for the next window, where this one becomes the previous.
+        return (self.duration - self.elapsed
+                + (1 - (self.num_requests - 1) / self.current)
+                * self.duration)
+
+
+class UserRateThrottle(SlidingWindowThrottle):
+    """Limits each user, or each IP address for anonymous requests."""
+
+    def get_cache_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user-{request.user.pk}'
+        return f'ip-{self.get_ident(request)}'
+
+
+class IPRateThrottle(SlidingWindowThrottle):
+    """Limits each IP address with the `<scope>_ip` rate."""
+    rate_suffix = '_ip'
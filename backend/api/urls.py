@@ -1,7 +1,8 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 
-from api import views
+from api import async_views, views
 
 router_v1 = routers.DefaultRouter()
 
@@ -30,4 +31,35 @@ urlpatterns = [
         views.RecipeRedirectView.as_view(),
         name='recipe-short-redirect'
     ),
+    path(
+        'metrics/db-pool/',
+        views.DatabasePoolMetricsView.as_view(),
+        name='metrics-db-pool'
+    ),
+    path(
+        'metrics/jobs/',
+        views.JobQueueMetricsView.as_view(),
+        name='metrics-jobs'
+    ),
 ]
+
+if settings.ASYNC_READ_VIEWS:
+    urlpatterns = [
+        path('tags/', async_views.tag_list, name='tags-list'),
+        path(
+            'ingredients/',
+            async_views.ingredient_list,
+            name='ingredients-list'
+        ),
+        path('recipes/', async_views.recipe_list, name='recipes-list'),
+        path(
+            'recipes/<int:pk>/',
+            async_views.recipe_detail,
+            name='recipes-detail'
+        ),
+        path(
+            's/<str:short_code>/',
+            async_views.recipe_redirect,
+            name='recipe-short-redirect'
+        ),
+    ] + urlpatterns
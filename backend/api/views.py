@@ -1,35 +1,123 @@
+import os
+
 import short_url
 
 from django.conf import settings
-from django.db.models import Sum
+from django.db.models import Count, Max, Q, Sum
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.parsers import JSONParser
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import (AllowAny, IsAdminUser,
+                                        IsAuthenticated)
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from api.conditional import (ConditionalGetMixin, get_tags_version,
+                             get_user_version)
+from api.deletion import hide_recipes, hide_user
+from api.fast_serializers import (RecipeListSerializer,
+                                  SubscriptionListSerializer,
+                                  UserListSerializer)
 from api.filters import IngredientFilter, RecipeFilter
+from api.ingredient_index import ingredient_index
 from api.pagination import CustomPagination
 from api.permissions import IsAdminOrAuthorOrReadOnly
+from api.renderers import FastJSONParser
+from api.similarity import find_similar_recipes
+from api.recipe_ids import get_recipe_ids
+from api.recommendations import UPDATE_DELAY
+from api.tasks import (delete_replaced_files, purge_deleted,
+                       update_recommendations)
 from api.serializers import (IngredientReadSerializer, RecipeCreateSerializer,
                              RecipeReadSerializer, RecipeSerializer,
                              TagSerializer, CustomUserSerializer,
                              SubscriptionsSerializer, AvatarSerializer)
+from foodgram.postgresql.base import get_pools
+from jobs.worker import get_queue_stats
 from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
-                            ShoppingCart, Tag)
+                            RecipeScore, ShoppingCart, Tag)
 from users.models import Subscribe, User
 
 
-class UserViewSet(UserViewSet):
-    queryset = User.objects.all().order_by('-id')
+def schedule_recommendations_update(user):
+    update_recommendations.delay(
+        [user.id], countdown=UPDATE_DELAY,
+        key=f'author-recommendations-{user.id}'
+    )
+
+
+class SparseFieldsetMixin:
+    """Limits response fields with `?fields=a,b` and `?omit=c`."""
+    sparse_fieldset_actions = ('list', 'retrieve')
+
+    def get_requested_fields(self, serializer_class=None):
+        query_params = self.request.query_params
+        if (self.action not in self.sparse_fieldset_actions
+                or ('fields' not in query_params
+                    and 'omit' not in query_params)):
+            return None
+        only = set(filter(None, query_params.get('fields', '').split(',')))
+        omit = set(query_params.get('omit', '').split(','))
+        serializer_class = serializer_class or self.get_serializer_class()
+        return tuple(
+            field for field in serializer_class.Meta.fields
+            if (not only or field in only) and field not in omit
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
+
+
+class UserViewSet(ConditionalGetMixin, SparseFieldsetMixin, UserViewSet):
+    queryset = User.objects.filter(is_deleted=False).order_by('-id')
     serializer_class = CustomUserSerializer
     pagination_class = CustomPagination
     permission_classes = [AllowAny]
+    read_from_replica = True
+    sparse_fieldset_actions = ('list', 'retrieve', 'me', 'subscriptions',
+                               'recommended')
+    throttle_scopes = {'create': 'signup'}
+
+    def get_version(self):
+        users = User.objects.filter(is_deleted=False)
+        user_version = get_user_version(self.request.user)
+        if self.action == 'retrieve':
+            updated_at = get_object_or_404(
+                users.values_list('updated_at', flat=True),
+                id=self.kwargs[self.lookup_field]
+            )
+            if self.request.user.is_authenticated:
+                return (updated_at, user_version), None
+            return updated_at, updated_at
+        return (
+            users.aggregate(count=Count('id'), updated=Max('updated_at')),
+            user_version
+        ), None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            return queryset.values(*UserListSerializer.get_values_fields(
+                self.get_requested_fields()
+            ))
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return UserListSerializer
+        return super().get_serializer_class()
+
+    def perform_destroy(self, instance):
+        hide_user(instance)
+        purge_deleted.delay(key='purge-deleted-now')
 
     @action(
         detail=False,
@@ -37,16 +125,46 @@ class UserViewSet(UserViewSet):
         permission_classes=[IsAuthenticated]
     )
     def me(self, request):
-        serializer = CustomUserSerializer(request.user)
+        serializer = CustomUserSerializer(
+            request.user,
+            fields=self.get_requested_fields(CustomUserSerializer)
+        )
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['get'])
     def subscriptions(self, request):
         user = self.request.user
-        queryset = User.objects.filter(following__user=user)
+        fields = self.get_requested_fields(SubscriptionListSerializer)
+        queryset = User.objects.filter(
+            following__user=user, is_deleted=False
+        ).values(
+            *SubscriptionListSerializer.get_values_fields(fields)
+        )
         page = self.paginate_queryset(queryset)
-        serializer = SubscriptionsSerializer(
-            page, many=True, context={'request': request}
+        serializer = SubscriptionListSerializer(
+            page, many=True, context={'request': request}, fields=fields
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=[IsAuthenticated]
+    )
+    def recommended(self, request):
+        """Authors followed or favorited by people with similar tastes."""
+        user = self.request.user
+        fields = self.get_requested_fields(UserListSerializer)
+        queryset = (
+            User.objects
+            .filter(recommended_to__user=user, is_deleted=False)
+            .exclude(following__user=user)
+            .order_by('-recommended_to__score')
+            .values(*UserListSerializer.get_values_fields(fields))
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = UserListSerializer(
+            page, many=True, context={'request': request}, fields=fields
         )
         return self.get_paginated_response(serializer.data)
 
@@ -57,7 +175,7 @@ class UserViewSet(UserViewSet):
     )
     def subscribe(self, request, **kwargs):
         user = self.request.user
-        author = get_object_or_404(User, id=kwargs['id'])
+        author = get_object_or_404(User, id=kwargs['id'], is_deleted=False)
 
         if request.method == 'POST':
             if Subscribe.objects.filter(user=user, author=author).exists():
@@ -66,6 +184,7 @@ class UserViewSet(UserViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             Subscribe.objects.create(user=user, author=author)
+            schedule_recommendations_update(user)
             serializer = SubscriptionsSerializer(
                 author, context={'request': request}
             )
@@ -80,13 +199,15 @@ class UserViewSet(UserViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         subscription.delete()
+        schedule_recommendations_update(user)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class UserAvatarViewSet(APIView):
-    parser_classes = [JSONParser]
+    parser_classes = [FastJSONParser]
     serializer_class = AvatarSerializer
     permission_classes = (IsAuthenticated,)
+    throttle_scope = 'avatar'
 
     def put(self, request):
         user = request.user
@@ -100,11 +221,17 @@ class UserAvatarViewSet(APIView):
     def delete(self, request):
         user = request.user
         if user.avatar:
-            user.avatar.delete(save=True)
+            # The file may be shared with other users, so it is only
+            # deleted once nothing refers to it.
+            old_avatar = user.avatar.name
+            user.avatar = ''
+            user.save(update_fields=['avatar', 'updated_at'])
+            delete_replaced_files.delay([old_avatar])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class TagViewSet(
+    ConditionalGetMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     viewsets.GenericViewSet
@@ -112,9 +239,20 @@ class TagViewSet(
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny, )
+    read_from_replica = True
+
+    def get_version(self):
+        if self.action == 'retrieve':
+            updated_at = get_object_or_404(
+                Tag.objects.values_list('updated_at', flat=True),
+                id=self.kwargs['pk']
+            )
+            return updated_at, updated_at
+        return get_tags_version(), None
 
 
 class IngredientViewSet(
+    ConditionalGetMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     viewsets.GenericViewSet
@@ -124,20 +262,323 @@ class IngredientViewSet(
     serializer_class = IngredientReadSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_class = IngredientFilter
+    read_from_replica = True
+
+    def get_version(self):
+        if self.action == 'retrieve':
+            updated_at = get_object_or_404(
+                Ingredient.objects.values_list('updated_at', flat=True),
+                id=self.kwargs['pk']
+            )
+            return updated_at, updated_at
+        return self.filter_queryset(Ingredient.objects.all()).aggregate(
+            count=Count('id'), updated=Max('updated_at')
+        ), None
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalGetMixin, SparseFieldsetMixin,
+                    viewsets.ModelViewSet):
     queryset = Recipe.objects.all().order_by('-id')
     permission_classes = (IsAdminOrAuthorOrReadOnly,)
     pagination_class = CustomPagination
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
+    read_from_replica = True
+    max_similar = 50
+    max_batch_ids = 100
+    # Pages starting past this many results are throttled with the
+    # deep_pagination scope.
+    max_cheap_offset = 200
+    throttle_scopes = {
+        'create': 'recipe_write',
+        'update': 'recipe_write',
+        'partial_update': 'recipe_write',
+        'download_shopping_cart': 'shopping_cart',
+        'cookable': 'search',
+        'similar': 'search',
+    }
+    facets = {'tags'}
+    sparse_fieldset_actions = ('list', 'retrieve', 'cookable', 'similar')
+    # Actions served by RecipeListSerializer over `.values()` rows.
+    values_actions = ('list', 'cookable', 'similar')
+
+    def get_throttle_scope(self):
+        if self.action in ('list', 'cookable'):
+            page = self.request.query_params.get('page', '')
+            page_size = self.paginator.get_page_size(self.request)
+            if page.isdigit() and (
+                    (int(page) - 1) * page_size >= self.max_cheap_offset):
+                return 'deep_pagination'
+        return self.throttle_scopes.get(self.action)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_requested_fields()
+        if self.action in self.values_actions:
+            return queryset.values(
+                *RecipeListSerializer.get_values_fields(fields)
+            )
+        if self.action == 'retrieve':
+            if fields is None or 'author' in fields:
+                queryset = queryset.select_related('author')
+            if fields is not None and 'text' not in fields:
+                queryset = queryset.defer('text')
+        return queryset
 
     def get_serializer_class(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in self.values_actions:
+            return RecipeListSerializer
+        if self.action == 'retrieve':
             return RecipeSerializer
         return RecipeCreateSerializer
 
+    def list(self, request, *args, **kwargs):
+        if 'ids' in request.query_params:
+            return self.get_conditional_response(self.list_by_ids, request)
+        facets = set(filter(None, request.query_params.get(
+            'facets', ''
+        ).split(',')))
+        if not facets <= self.facets:
+            supported = ', '.join(sorted(self.facets))
+            raise ValidationError(f'facets must be a subset of: {supported}.')
+        if self.cached_page_ids is not None:
+            response = self.get_conditional_response(
+                self.list_cached_page, request
+            )
+        else:
+            response = super().list(request, *args, **kwargs)
+        if 'tags' in facets and response.status_code == status.HTTP_200_OK:
+            response.data['facets'] = {'tags': self.get_tag_facets()}
+        return response
+
+    def get_cacheable_filters(self):
+        """Return `(state, queryset)` of a list the id cache can serve.
+
+        `state` is the normalized filters. Lists with facets or filtered by
+        the user's favorites or cart are not cached, and none are without a
+        shared cache (RECIPE_IDS_CACHE).
+        """
+        query_params = self.request.query_params
+        if not settings.RECIPE_IDS_CACHE or self.action != 'list' or (
+                'ids' in query_params or 'facets' in query_params):
+            return None
+        filterset = self.filterset_class(
+            query_params, queryset=self.queryset.all(), request=self.request
+        )
+        if not filterset.is_valid():
+            return None
+        filters = filterset.form.cleaned_data
+        if self.request.user.is_authenticated and (
+                filters['is_favorited'] or filters['is_in_shopping_cart']):
+            return None
+        state = (
+            filters['author'],
+            tuple(sorted(tag.id for tag in filters['tags'])),
+            filters['ordering'],
+        )
+        return state, filterset.qs
+
+    @cached_property
+    def cached_page_ids(self):
+        """Ids of the requested page, from the cached list of ids.
+
+        None when the list is not cached or the page lies past the cached
+        ids; the page is then queried as usual.
+        """
+        cacheable = self.get_cacheable_filters()
+        if cacheable is None:
+            return None
+        count, recipe_ids = get_recipe_ids(*cacheable)
+        positions = self.paginate_queryset(range(count))
+        if positions and positions[-1] >= len(recipe_ids):
+            return None
+        return [recipe_ids[position] for position in positions]
+
+    def list_cached_page(self, request):
+        return self.get_paginated_response(
+            self.get_recipes_data(self.cached_page_ids)
+        )
+
+    def get_requested_ids(self):
+        try:
+            recipe_ids = list(dict.fromkeys(
+                int(recipe_id) for recipe_id
+                in self.request.query_params['ids'].split(',') if recipe_id
+            ))
+        except ValueError:
+            raise ValidationError('ids must be integers.')
+        if not 0 < len(recipe_ids) <= self.max_batch_ids:
+            raise ValidationError(
+                f'ids must list between 1 and {self.max_batch_ids} recipes.'
+            )
+        return recipe_ids
+
+    def list_by_ids(self, request):
+        """Recipes from `?ids=`, in the requested order.
+
+        Other filters still apply; ids that do not exist or are filtered
+        out are listed in `missing`.
+        """
+        recipe_ids = self.get_requested_ids()
+        rows = self.get_recipe_rows(
+            recipe_ids, self.filter_queryset(self.get_queryset())
+        )
+        # `fields`/`omit` can leave the id out of the serialized recipes.
+        found = {row['id'] for row in rows}
+        return Response({
+            'results': self.get_serializer(rows, many=True).data,
+            'missing': [
+                recipe_id for recipe_id in recipe_ids
+                if recipe_id not in found
+            ],
+        })
+
+    def get_version(self):
+        user_version = get_user_version(self.request.user)
+        if self.action == 'retrieve':
+            recipe = get_object_or_404(
+                Recipe.objects.values_list('updated_at', 'author__updated_at'),
+                id=self.kwargs['pk']
+            )
+            tags_version = get_tags_version()
+            if self.request.user.is_authenticated:
+                return (recipe, tags_version, user_version), None
+            return (recipe, tags_version), max(
+                *recipe, tags_version['updated'] or recipe[0]
+            )
+        if self.action == 'list' and self.cached_page_ids is not None:
+            # The count, the page and the order are in the ids; only the
+            # page's recipes can change without changing them.
+            return (
+                self.paginator.page.paginator.count,
+                self.cached_page_ids,
+                Recipe.objects.filter(id__in=self.cached_page_ids).aggregate(
+                    updated=Max('updated_at'),
+                    authors_updated=Max('author__updated_at'),
+                ),
+                get_tags_version(),
+                user_version,
+            ), None
+        recipes = self.filter_queryset(Recipe.objects.all())
+        if 'ids' in self.request.query_params:
+            recipes = recipes.filter(id__in=self.get_requested_ids())
+        elif 'facets' in self.request.query_params:
+            recipes = self.get_facet_recipes()
+        version = [
+            recipes.aggregate(
+                count=Count('id'),
+                updated=Max('updated_at'),
+                authors_updated=Max('author__updated_at'),
+            ),
+            get_tags_version(),
+            user_version,
+        ]
+        if 'ordering' in self.request.query_params:
+            # Every refresh gives all scores the same updated_at.
+            version.append(
+                RecipeScore.objects.order_by('-popular', '-recipe')
+                .values_list('updated_at', flat=True).first()
+            )
+        return version, None
+
+    def get_facet_recipes(self):
+        data = self.request.query_params.copy()
+        data.pop('tags', None)
+        return self.filterset_class(
+            data, queryset=Recipe.objects.all(), request=self.request
+        ).qs
+
+    def get_tag_facets(self):
+        """Recipe counts per tag for the current filters except `tags`.
+
+        Each count is the number of recipes with the tag that match the
+        other filters, whether or not the tag is selected; recipes already
+        listed through another selected tag are counted too.
+        """
+        recipes = self.get_facet_recipes()
+        return list(
+            Tag.objects
+            .annotate(count=Count('recipe', filter=Q(recipe__in=recipes)))
+            .order_by('id')
+            .values('id', 'name', 'slug', 'count')
+        )
+
+    def perform_destroy(self, instance):
+        hide_recipes([instance.id])
+        purge_deleted.delay(key='purge-deleted-now')
+
+    def get_cookable_params(self, request):
+        try:
+            ingredient_ids = [
+                int(ingredient_id) for ingredient_id
+                in request.query_params.get('ingredients', '').split(',')
+                if ingredient_id
+            ]
+            max_missing = int(request.query_params.get('max_missing', 0))
+        except ValueError:
+            raise ValidationError(
+                'ingredients and max_missing must be integers.'
+            )
+        if not ingredient_ids:
+            raise ValidationError('ingredients is required.')
+        if max_missing < 0:
+            raise ValidationError(
+                'max_missing must be a non-negative integer.'
+            )
+        return ingredient_ids, max_missing
+
+    @action(detail=False, methods=['get'])
+    def cookable(self, request):
+        """Recipes made of the given ingredients, fewest missing first."""
+        ingredient_ids, max_missing = self.get_cookable_params(request)
+        recipe_ids, missing = ingredient_index.search(
+            ingredient_ids, max_missing
+        )
+        page = self.paginate_queryset(range(len(recipe_ids)))
+        page_ids = recipe_ids[page].tolist()
+        missing = dict(zip(page_ids, missing[page].tolist()))
+        rows = self.get_recipe_rows(page_ids)
+        data = self.get_serializer(rows, many=True).data
+        for row, recipe in zip(rows, data):
+            recipe['missing_ingredients'] = missing[row['id']]
+        return self.get_paginated_response(data)
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, **kwargs):
+        """Recipes with the most similar ingredients and tags."""
+        recipe_id = get_object_or_404(Recipe, id=kwargs['pk']).id
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            raise ValidationError('limit must be an integer.')
+        if not 0 < limit <= self.max_similar:
+            raise ValidationError(
+                f'limit must be between 1 and {self.max_similar}.'
+            )
+        similar = dict(find_similar_recipes(recipe_id, limit))
+        rows = self.get_recipe_rows(list(similar))
+        data = self.get_serializer(rows, many=True).data
+        for row, recipe in zip(rows, data):
+            recipe['similarity'] = round(similar[row['id']], 3)
+        return Response(data)
+
+    def get_recipe_rows(self, recipe_ids, queryset=None):
+        """Rows of the existing recipes, in the order of `recipe_ids`."""
+        if queryset is None:
+            queryset = self.get_queryset()
+        rows = {
+            row['id']: row
+            for row in queryset.filter(id__in=recipe_ids).order_by()
+        }
+        return [rows[recipe_id] for recipe_id in recipe_ids
+                if recipe_id in rows]
+
+    def get_recipes_data(self, recipe_ids, queryset=None):
+        """Serialize recipes by id, keeping the order of `recipe_ids`."""
+        return self.get_serializer(
+            self.get_recipe_rows(recipe_ids, queryset), many=True
+        ).data
+
     def toggle_recipe_status(
         self, request, model, **kwargs
     ):
@@ -148,12 +589,16 @@ class RecipeViewSet(viewsets.ModelViewSet):
             if obj.exists():
                 return Response(status=status.HTTP_400_BAD_REQUEST)
             model.objects.create(user=request.user, recipe=recipe)
+            if model is Favorite:
+                schedule_recommendations_update(request.user)
             serializer = RecipeReadSerializer(recipe)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         elif request.method == 'DELETE':
             if obj.exists():
                 obj.delete()
+                if model is Favorite:
+                    schedule_recommendations_update(request.user)
                 return Response(status=status.HTTP_204_NO_CONTENT)
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
@@ -187,7 +632,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         ingredients = (
             IngredientInRecipe.objects
-            .filter(recipe__shopping_cart__user=request.user)
+            .filter(recipe__shopping_cart__user=request.user,
+                    recipe__is_deleted=False)
             .values('ingredient__name', 'ingredient__measurement_unit')
             .annotate(total_amount=Sum('amount'))
             .order_by('ingredient__name')
@@ -233,3 +679,22 @@ class RecipeRedirectView(APIView):
             return Response({"detail": "Invalid short link"}, status=404)
 
         return redirect(f'/recipes/{recipe_id}/')
+
+
+class DatabasePoolMetricsView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response({
+            'pid': os.getpid(),
+            'pools': {
+                alias: pool.stats() for alias, pool in get_pools().items()
+            },
+        })
+
+
+class JobQueueMetricsView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response({'queues': list(get_queue_stats())})
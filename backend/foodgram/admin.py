@@ -0,0 +1,40 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """Uses the planner's row estimate to count large unfiltered tables.
+
+    An exact COUNT(*) scans the whole table; for the admin changelist an
+    approximate page count is good enough. Filtered querysets and small
+    tables are still counted exactly.
+    """
+    min_estimate = 100000
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if not query.where:
+            with connections[self.object_list.db].cursor() as cursor:
+                # Partitioned tables have no estimate of their own, so the
+                # estimates of their partitions are added up.
+                cursor.execute(
+                    'SELECT SUM(GREATEST(reltuples, 0)) FROM pg_class '
+                    'WHERE oid = %s::regclass OR oid IN ('
+                    '  SELECT inhrelid FROM pg_inherits'
+                    '  WHERE inhparent = %s::regclass'
+                    ')',
+                    [query.model._meta.db_table] * 2
+                )
+                estimate = int(cursor.fetchone()[0] or 0)
+            if estimate >= self.min_estimate:
+                return estimate
+        return super().count
+
+
+class ScalableAdminMixin:
+    """Changelist settings for tables with millions of rows."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
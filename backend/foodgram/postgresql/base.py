@@ -0,0 +1,113 @@
+import os
+import threading
+
+from django.db.backends.postgresql import base
+
+from foodgram.postgresql.pool import ConnectionPool
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pools():
+    pid = os.getpid()
+    return {
+        alias: pool for (alias, pool_pid), pool in pools.items()
+        if pool_pid == pid
+    }
+
+
+def is_alive(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        # A connection that Django has not configured yet is not in
+        # autocommit mode; do not leave it inside a transaction.
+        if not connection.autocommit:
+            connection.rollback()
+    except base.Database.Error:
+        return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend with connection health checks and pooling.
+
+    `CONN_HEALTH_CHECKS` checks a persistent connection once per request
+    before it is reused, like Django 4.1+ does. `POOL_SIZE` > 0 makes the
+    connections of every thread of the process come from a shared pool,
+    which matters for the ASGI and threaded modes; a pooled connection is
+    only held by a thread for the duration of a request.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+
+    @property
+    def health_check_enabled(self):
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    def get_pool(self):
+        max_size = self.settings_dict.get('POOL_SIZE', 0)
+        if not max_size:
+            return None
+        key = (self.alias, os.getpid())
+        with pools_lock:
+            if key not in pools:
+                conn_params = self.get_connection_params()
+                pools[key] = ConnectionPool(
+                    lambda: super(DatabaseWrapper, self).get_new_connection(
+                        conn_params
+                    ),
+                    max_size,
+                    self.settings_dict.get('POOL_TIMEOUT', 30),
+                    check=is_alive if self.health_check_enabled else None,
+                )
+            return pools[key]
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool()
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        connection = pool.acquire()
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def _close(self):
+        pool = self.get_pool()
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.release(
+                self.connection,
+                discard=self.errors_occurred or self.in_atomic_block,
+            )
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # Pooled connections go back to the pool at the start and end of
+        # every request, whatever CONN_MAX_AGE, so idle threads of the
+        # process do not hold them.
+        if (self.connection is not None and not self.in_atomic_block
+                and self.settings_dict.get('POOL_SIZE', 0)):
+            self.close()
+        self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        if (self.connection is None or not self.health_check_enabled
+                or self.health_check_done):
+            return
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import deque
+
+from psycopg2 import OperationalError, extensions
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """Thread-safe pool of psycopg2 connections shared by a process."""
+
+    def __init__(self, connect, max_size, timeout, check=None):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check = check
+        self._idle = deque()
+        self._condition = threading.Condition()
+        self.size = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0
+        self.timeouts = 0
+        self.discarded = 0
+
+    def acquire(self):
+        while True:
+            connection = self._checkout()
+            if connection is None:
+                break
+            if self.check is None or self.check(connection):
+                return connection
+            self.release(connection, discard=True)
+        try:
+            return self.connect()
+        except Exception:
+            with self._condition:
+                self.size -= 1
+                self.in_use -= 1
+                self._condition.notify()
+            raise
+
+    def prefill(self, count):
+        """Open connections until `count` of them are in the pool."""
+        acquired = []
+        try:
+            while len(acquired) < min(count, self.max_size):
+                acquired.append(self.acquire())
+        finally:
+            for connection in acquired:
+                self.release(connection)
+
+    def _checkout(self):
+        """Take an idle connection, or reserve a slot for a new one (None)."""
+        with self._condition:
+            started = None
+            while True:
+                while self._idle:
+                    connection = self._idle.pop()
+                    if connection.closed:
+                        self.size -= 1
+                        continue
+                    self._mark_used(started)
+                    return connection
+                if self.size < self.max_size:
+                    self.size += 1
+                    self._mark_used(started)
+                    return None
+                if started is None:
+                    started = time.monotonic()
+                    self.waits += 1
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f'No database connection available in the pool '
+                        f'within {self.timeout} s.'
+                    )
+                self.waiting += 1
+                self._condition.wait(remaining)
+                self.waiting -= 1
+
+    def _mark_used(self, started):
+        self.in_use += 1
+        self.checkouts += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        if started is not None:
+            self.wait_time += time.monotonic() - started
+
+    def release(self, connection, discard=False):
+        if not discard and not connection.closed:
+            try:
+                status = connection.info.transaction_status
+                if status != extensions.TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+            except Exception:
+                discard = True
+        if discard and not connection.closed:
+            try:
+                connection.close()
+            except Exception:
+                pass
+        with self._condition:
+            self.in_use -= 1
+            if discard or connection.closed:
+                self.size -= 1
+                self.discarded += 1
+            else:
+                self._idle.append(connection)
+            self._condition.notify()
+
+    def stats(self):
+        with self._condition:
+            return {
+                'max_size': self.max_size,
+                'size': self.size,
+                'in_use': self.in_use,
+                'idle': len(self._idle),
+                'peak_in_use': self.peak_in_use,
+                'waiting': self.waiting,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'wait_time_ms': self.wait_time * 1000,
+                'timeouts': self.timeouts,
+                'discarded': self.discarded,
+                'saturation': self.in_use / self.max_size,
+            }
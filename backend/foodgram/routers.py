@@ -0,0 +1,27 @@
+from contextvars import ContextVar
+
+from django.db import connections
+
+REPLICA = 'replica'
+
+use_replica = ContextVar('use_replica', default=False)
+
+
+class ReplicaRouter:
+    """Send reads to the replica while `use_replica` is set for a request."""
+
+    def db_for_read(self, model, **hints):
+        if use_replica.get() and REPLICA in connections.databases:
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA:
+            return False
+        return None
@@ -30,16 +30,20 @@ INSTALLED_APPS = [
     'users',
     'recipes',
     'api',
+    'jobs',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
+    'api.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'foodgram.urls'
@@ -62,18 +66,66 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+ASYNC_READ_VIEWS = strtobool(os.getenv('ASYNC_READ_VIEWS', 'False'))
+
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'foodgram.postgresql',
         'NAME': os.getenv('POSTGRES_DB', 'foodgram_db'),
         'USER': os.getenv('POSTGRES_USER', 'foodgram_user'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'PORT': os.getenv('DB_PORT', 5432),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': strtobool(
+            os.getenv('DB_CONN_HEALTH_CHECKS', 'True')
+        ),
+        'POOL_SIZE': int(os.getenv('DB_POOL_SIZE', 0)),
+        'POOL_TIMEOUT': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+    }
+}
+
+if os.getenv('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DB_REPLICA_HOST'),
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['foodgram.routers.ReplicaRouter']
+
+REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', 10))
+
+WARMUP_POOL_CONNECTIONS = int(os.getenv('WARMUP_POOL_CONNECTIONS', 2))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 512))
+COMPRESSION_CACHE_TIMEOUT = int(os.getenv('COMPRESSION_CACHE_TIMEOUT', 600))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', 5))
+
+# Whether all processes see the same cache; the local memory cache lives
+# inside a single process.
+SHARED_CACHE = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Cached id lists are dropped by bumping a counter in the cache, which other
+# processes only see in a shared cache.
+RECIPE_IDS_CACHE = SHARED_CACHE
+RECIPE_IDS_CACHE_SIZE = int(os.getenv('RECIPE_IDS_CACHE_SIZE', 1000))
+RECIPE_IDS_CACHE_TIMEOUT = int(os.getenv('RECIPE_IDS_CACHE_TIMEOUT', 600))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -110,6 +162,12 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+DEFAULT_FILE_STORAGE = 'foodgram.storage.ContentAddressedStorage'
+
+# Unused media files modified more recently than this are deleted later, so
+# that an upload reusing one has time to commit its row.
+MEDIA_DELETE_GRACE_SECONDS = 15 * 60
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'users.User'
@@ -122,8 +180,83 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+    ],
+
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.UserRateThrottle',
+        'api.throttling.IPRateThrottle',
     ],
+
+    'DEFAULT_THROTTLE_RATES': {
+        'recipe_write': '30/hour',
+        'recipe_write_ip': '100/hour',
+        'shopping_cart': '10/min',
+        'shopping_cart_ip': '30/min',
+        'deep_pagination': '20/min',
+        'deep_pagination_ip': '60/min',
+        'search': '60/min',
+        'search_ip': '200/min',
+        'avatar': '10/hour',
+        'avatar_ip': '30/hour',
+        'signup_ip': '10/hour',
+    },
+
+    # The gateway nginx adds the client address to X-Forwarded-For.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1)),
+}
+
+# Revoked tokens are dropped from the cache of the process that revoked
+# them, so a per-process cache only gets the short-lived local tier.
+TOKEN_CACHE = SHARED_CACHE
+
+TOKEN_CACHE_TIMEOUT = int(os.getenv('TOKEN_CACHE_TIMEOUT', 300))
+
+TOKEN_LOCAL_CACHE_TIMEOUT = int(os.getenv('TOKEN_LOCAL_CACHE_TIMEOUT', 5))
+
+TOKEN_LOCAL_CACHE_SIZE = 1024
+
+INGREDIENT_INDEX_PATH = os.getenv('INGREDIENT_INDEX_PATH', '')
+
+# Run jobs inline instead of queueing them, e.g. in tests.
+JOBS_EAGER = strtobool(os.getenv('JOBS_EAGER', 'False'))
+
+JOBS_RETRY_BACKOFF = 10
+
+JOBS_RETRY_MAX_DELAY = 60 * 60
+
+# Running jobs whose lease the worker stopped extending are considered lost
+# once it expires; workers extend it every JOBS_HEARTBEAT_SECONDS.
+JOBS_LEASE_SECONDS = int(os.getenv('JOBS_LEASE_SECONDS', 5 * 60))
+
+JOBS_HEARTBEAT_SECONDS = 60
+
+JOBS_RETENTION_SECONDS = 24 * 60 * 60
+
+JOBS_SCHEDULE = {
+    'refresh-recipe-scores': {
+        'task': 'api.tasks.refresh_recipe_scores',
+        'interval': 10 * 60,
+    },
+    'purge-deleted': {
+        'task': 'api.tasks.purge_deleted',
+        'interval': 60 * 60,
+    },
+    'rebuild-author-recommendations': {
+        'task': 'api.tasks.rebuild_author_recommendations',
+        'interval': 24 * 60 * 60,
+    },
 }
 
 DJOSER = {
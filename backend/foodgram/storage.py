@@ -0,0 +1,83 @@
+import hashlib
+import os
+import posixpath
+from collections import Counter
+
+from django.apps import apps
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+
+HASH_LENGTH = 64
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Stores every file under the SHA-256 of its content.
+
+    Uploading the same file twice returns the name of the existing copy,
+    so a file may be shared by many rows: delete it only through
+    `api.deletion.delete_unused_files`, never with `FieldFile.delete()`.
+    Reusing a file updates its modification time.
+    Since the content behind a name never changes, it can be cached
+    forever.
+    """
+
+    def get_content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        directory = posixpath.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return posixpath.join(directory, digest.hexdigest() + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.get_content_name(name, content)
+        if self.exists(name):
+            try:
+                # A fresh modification time keeps the file from being
+                # deleted as unused before the new row is committed.
+                os.utime(self.path(name))
+                return name
+            except FileNotFoundError:
+                pass
+        saved = self._save(name, content)
+        if saved != name:
+            # A concurrent upload of the same content created the file
+            # first and _save() fell back to another name.
+            self.delete(saved)
+        return name
+
+
+def is_content_addressed(name):
+    stem = os.path.splitext(posixpath.basename(name))[0]
+    return len(stem) == HASH_LENGTH and all(
+        char in '0123456789abcdef' for char in stem
+    )
+
+
+def get_file_fields(storage):
+    """All file fields of installed models that keep files in `storage`."""
+    return [
+        field
+        for model in apps.get_models()
+        for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField)
+        and field.storage.location == storage.location
+    ]
+
+
+def count_references(storage, names):
+    """Number of rows referring to each of `names`, over all file fields."""
+    counts = Counter()
+    for field in get_file_fields(storage):
+        counts.update(
+            field.model._base_manager
+            .filter(**{f'{field.name}__in': names})
+            .values_list(field.name, flat=True)
+        )
+    return counts
@@ -0,0 +1,91 @@
+import logging
+import time
+from importlib import import_module
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.urls import get_resolver
+from rest_framework.serializers import BaseSerializer
+
+from api.ingredient_index import ingredient_index
+
+logger = logging.getLogger(__name__)
+
+SERIALIZER_MODULES = ('api.serializers',)
+
+
+def warm_imports():
+    """Do the per-process work that needs no database.
+
+    Safe to run in the gunicorn master before workers are forked, so they
+    share the result.
+    """
+    for model in apps.get_models():
+        model._meta.get_fields()
+    # Populating the resolver imports every view.
+    get_resolver().reverse_dict
+    for module_name in SERIALIZER_MODULES:
+        module = import_module(module_name)
+        for serializer in vars(module).values():
+            if (isinstance(serializer, type)
+                    and issubclass(serializer, BaseSerializer)
+                    and serializer.__module__ == module_name):
+                try:
+                    serializer().fields
+                except Exception:
+                    logger.warning('Could not build %s', serializer.__name__,
+                                   exc_info=True)
+
+
+def warm_connections():
+    """Fill the connection pools of this process.
+
+    Connections cannot be shared between processes, so this and
+    `warm_data` must run after gunicorn forks the worker. Without a pool
+    nothing is opened: a connection belongs to the thread that opened it,
+    and requests may be served by other threads.
+    """
+    for alias in settings.DATABASES:
+        pool = connections[alias].get_pool()
+        if pool is not None:
+            pool.prefill(settings.WARMUP_POOL_CONNECTIONS)
+
+
+def warm_data():
+    """Build the in-memory ingredient index used by `cookable`."""
+    ingredient_index.sync()
+    # Give pooled connections back for the threads that serve requests and
+    # do not keep the others open in a thread that may serve none.
+    connections.close_all()
+
+
+WARMUP_STEPS = (
+    ('imports', warm_imports),
+    ('connections', warm_connections),
+    ('data', warm_data),
+)
+
+
+def warmup(steps=None):
+    """Run warm-up steps and return how long each took, in seconds.
+
+    A failing step is logged and the remaining ones are skipped: the
+    process then starts cold instead of not starting, e.g. while the
+    database is unavailable.
+    """
+    timings = {}
+    for name, step in WARMUP_STEPS:
+        if steps is None or name in steps:
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception:
+                logger.exception('Warm-up step %s failed, skipping the rest',
+                                 name)
+                break
+            timings[name] = time.perf_counter() - started
+    logger.info('Warm-up done: %s', ', '.join(
+        f'{name} {seconds * 1000:.0f} ms' for name, seconds in timings.items()
+    ))
+    return timings
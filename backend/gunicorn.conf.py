@@ -0,0 +1,29 @@
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+
+worker_class = os.getenv(
+    'GUNICORN_WORKER_CLASS', 'uvicorn.workers.UvicornWorker'
+)
+
+# Load Django in the master so forked workers share the imported code.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+
+warmup = os.getenv('GUNICORN_WARMUP', 'True') == 'True'
+
+
+def when_ready(server):
+    if warmup and preload_app:
+        from foodgram.warmup import warmup as run_warmup
+        run_warmup(steps=('imports',))
+
+
+def post_worker_init(worker):
+    # Runs in each worker before it accepts connections.
+    if warmup:
+        from foodgram.warmup import warmup as run_warmup
+        run_warmup(
+            steps=('connections', 'data') if preload_app else None
+        )
@@ -0,0 +1,42 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.worker import Worker, get_queue_stats
+
+
+class Command(BaseCommand):
+    help = 'Runs queued jobs until interrupted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queue', action='append', dest='queues', default=[],
+            help='Queue to take jobs from, can be repeated. All by default.'
+        )
+        parser.add_argument('--concurrency', type=int, default=2,
+                            help='Number of jobs run at the same time.')
+        parser.add_argument('--poll-interval', type=float, default=1,
+                            help='Seconds to wait when no job is due.')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit when there are no due jobs left.')
+        parser.add_argument('--stats', action='store_true',
+                            help='Print per-queue statistics and exit.')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            for queue in get_queue_stats():
+                self.stdout.write(' '.join(
+                    f'{name}={value}' for name, value in queue.items()
+                ))
+            return
+        worker = Worker(options['queues'], options['concurrency'],
+                        options['poll_interval'], options['burst'])
+        signal.signal(signal.SIGTERM, worker.stop)
+        signal.signal(signal.SIGINT, worker.stop)
+        started = time.monotonic()
+        worker.run()
+        self.stdout.write(
+            f'Processed {worker.processed} jobs, {worker.failed} failed, '
+            f'in {time.monotonic() - started:.1f} s'
+        )
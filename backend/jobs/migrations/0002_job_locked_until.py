@@ -0,0 +1,32 @@
+# Generated by Django 3.2.15 on 2026-10-19 18:14
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def set_running_leases(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    Job.objects.filter(status='running').update(
+        locked_until=F('started_at') + timedelta(
+            seconds=settings.JOBS_LEASE_SECONDS
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Занята до'),
+        ),
+        migrations.RunPython(set_running_leases, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.15 on 2026-10-19 18:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_job_locked_until'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='job',
+            name='unique_active_job_key',
+        ),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'queued')), fields=('key',), name='unique_queued_job_key'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    queue = models.CharField('Очередь', max_length=100, default='default')
+    name = models.CharField('Функция', max_length=255)
+    args = models.JSONField('Аргументы', default=list)
+    # At most one queued job may have the same key. A running job does not
+    # count, so changes made while it runs queue it again.
+    key = models.CharField('Ключ', max_length=255, blank=True, null=True)
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Максимум попыток', default=5
+    )
+    run_at = models.DateTimeField('Запустить после', default=timezone.now)
+    created_at = models.DateTimeField('Дата создания', auto_now_add=True)
+    started_at = models.DateTimeField('Начало', blank=True, null=True)
+    # Extended by the worker while the job runs.
+    locked_until = models.DateTimeField('Занята до', blank=True, null=True)
+    finished_at = models.DateTimeField('Окончание', blank=True, null=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = [
+            models.Index(
+                fields=['queue', 'run_at'], name='job_queued_run_at',
+                condition=Q(status='queued')
+            ),
+            models.Index(fields=['status', 'finished_at'],
+                         name='job_status_finished_at'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['key'], name='unique_queued_job_key',
+                condition=Q(status='queued')
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
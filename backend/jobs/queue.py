@@ -0,0 +1,88 @@
+import functools
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from jobs.models import Job
+
+
+def job(queue='default', max_attempts=5):
+    """Mark a function as a job, adding `func.delay(*args, **options)`.
+
+    Arguments must be JSON-serializable. The job row is written in the
+    caller's transaction, so it runs only if that transaction commits.
+    """
+    def decorator(func):
+        func.job_queue = queue
+        func.job_max_attempts = max_attempts
+        func.delay = functools.partial(enqueue, func)
+        return func
+    return decorator
+
+
+def get_name(func):
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def get_func(name):
+    module, _, attribute = name.rpartition('.')
+    return getattr(import_module(module), attribute)
+
+
+def enqueue(func, *args, queue=None, run_at=None, countdown=None, key=None):
+    """Queue `func(*args)` and return the Job, or None if run eagerly.
+
+    `run_at` or `countdown` (seconds) schedules the job. With a `key` the
+    job is not added while another job with that key is queued; a job that
+    is already running may have missed the caller's changes, so it does
+    not count.
+    """
+    if settings.JOBS_EAGER:
+        func(*args)
+        return None
+    if countdown is not None:
+        run_at = timezone.now() + timedelta(seconds=countdown)
+    job = Job(
+        queue=queue or getattr(func, 'job_queue', 'default'),
+        name=get_name(func),
+        args=list(args),
+        key=key,
+        max_attempts=getattr(func, 'job_max_attempts', 5),
+        run_at=run_at or timezone.now(),
+    )
+    if key is None:
+        job.save()
+        return job
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        return None
+    return job
+
+
+def schedule_periodic_jobs():
+    """Queue the next run of every job in JOBS_SCHEDULE that is not queued.
+
+    Entries look like `'name': {'task': 'module.func', 'interval': 600}`.
+    """
+    for key, entry in settings.JOBS_SCHEDULE.items():
+        if Job.objects.filter(
+                key=key, status__in=(Job.QUEUED, Job.RUNNING)).exists():
+            continue
+        last_run = (
+            Job.objects.filter(key=key, status=Job.DONE)
+            .order_by('-finished_at')
+            .values_list('finished_at', flat=True)
+            .first()
+        )
+        run_at = timezone.now()
+        if last_run is not None:
+            run_at = max(
+                run_at, last_run + timedelta(seconds=entry['interval'])
+            )
+        enqueue(get_func(entry['task']), *entry.get('args', ()),
+                run_at=run_at, key=key)
@@ -0,0 +1,240 @@
+import logging
+import random
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import (IntegrityError, close_old_connections, connection,
+                       transaction)
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import get_func, schedule_periodic_jobs
+
+logger = logging.getLogger(__name__)
+
+
+def claim_job(queues):
+    """Lock the next due job and mark it running.
+
+    SKIP LOCKED lets concurrent workers claim different jobs instead of
+    waiting for each other's row locks.
+    """
+    with transaction.atomic():
+        jobs = Job.objects.select_for_update(skip_locked=True).filter(
+            status=Job.QUEUED, run_at__lte=timezone.now()
+        )
+        if queues:
+            jobs = jobs.filter(queue__in=queues)
+        job = jobs.order_by('run_at', 'id').first()
+        if job is None:
+            return None
+        job.status = Job.RUNNING
+        job.attempts += 1
+        job.started_at = timezone.now()
+        job.locked_until = get_lease_end()
+        job.save(update_fields=['status', 'attempts', 'started_at',
+                                'locked_until'])
+    return job
+
+
+def get_lease_end():
+    return timezone.now() + timedelta(seconds=settings.JOBS_LEASE_SECONDS)
+
+
+def extend_leases(job_ids):
+    return Job.objects.filter(id__in=job_ids, status=Job.RUNNING).update(
+        locked_until=get_lease_end()
+    )
+
+
+def get_retry_delay(attempts):
+    """Exponential backoff with jitter, in seconds."""
+    delay = min(settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1),
+                settings.JOBS_RETRY_MAX_DELAY)
+    return delay * random.uniform(0.5, 1)
+
+
+def requeue_job(job_id, run_at, error):
+    """Queue a job again, unless a job with the same key is queued.
+
+    That job then runs instead, and this one is marked failed.
+    """
+    try:
+        with transaction.atomic():
+            return Job.objects.filter(id=job_id).update(
+                status=Job.QUEUED, run_at=run_at, last_error=error
+            )
+    except IntegrityError:
+        Job.objects.filter(id=job_id).update(
+            status=Job.FAILED, finished_at=timezone.now(), last_error=error
+        )
+        return 0
+
+
+def run_job(job):
+    try:
+        get_func(job.name)(*job.args)
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if job.attempts >= job.max_attempts:
+            logger.error('Job %s %s failed: %s', job.id, job.name, error)
+            Job.objects.filter(id=job.id).update(
+                status=Job.FAILED, finished_at=now, last_error=error
+            )
+            return False
+        delay = get_retry_delay(job.attempts)
+        logger.warning('Job %s %s failed, retrying in %.0f s: %s',
+                       job.id, job.name, delay, error)
+        requeue_job(job.id, now + timedelta(seconds=delay), error)
+        return False
+    Job.objects.filter(id=job.id).update(
+        status=Job.DONE, finished_at=timezone.now()
+    )
+    return True
+
+
+def requeue_stale_jobs():
+    """Return jobs of workers that died while running them to the queue."""
+    expired = Job.objects.filter(
+        status=Job.RUNNING, locked_until__lt=timezone.now()
+    )
+    expired.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, finished_at=timezone.now(),
+        last_error='Lease expired'
+    )
+    return sum(
+        requeue_job(job_id, timezone.now(), 'Lease expired')
+        for job_id in expired.values_list('id', flat=True)
+    )
+
+
+def prune_finished_jobs():
+    return Job.objects.filter(
+        status=Job.DONE,
+        finished_at__lt=timezone.now() - timedelta(
+            seconds=settings.JOBS_RETENTION_SECONDS
+        ),
+    ).delete()[0]
+
+
+def get_queue_stats():
+    """Job counts and the age of the oldest due job of every queue."""
+    now = timezone.now()
+    due = Q(status=Job.QUEUED, run_at__lte=now)
+    stats = (
+        Job.objects.values('queue')
+        .annotate(
+            queued=Count('id', filter=due),
+            scheduled=Count('id', filter=Q(status=Job.QUEUED,
+                                           run_at__gt=now)),
+            running=Count('id', filter=Q(status=Job.RUNNING)),
+            failed=Count('id', filter=Q(status=Job.FAILED)),
+            done_last_hour=Count('id', filter=Q(
+                status=Job.DONE, finished_at__gte=now - timedelta(hours=1)
+            )),
+            oldest_due=Min('run_at', filter=due),
+        )
+        .order_by('queue')
+    )
+    for queue in stats:
+        oldest_due = queue.pop('oldest_due')
+        queue['lag_seconds'] = (
+            round((now - oldest_due).total_seconds(), 1)
+            if oldest_due else 0
+        )
+        yield queue
+
+
+class Worker:
+    """Runs jobs from `queues` in `concurrency` threads.
+
+    In burst mode the worker stops once there is nothing left to run. A
+    separate thread extends the leases of the running jobs, so jobs that
+    run longer than JOBS_LEASE_SECONDS are not taken for lost.
+    """
+    maintenance_interval = 10
+
+    def __init__(self, queues=(), concurrency=1, poll_interval=1,
+                 burst=False):
+        self.queues = list(queues)
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.stopping = threading.Event()
+        self.finished = threading.Event()
+        self.lock = threading.Lock()
+        self.running = set()
+        self.processed = self.failed = 0
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def run(self):
+        threads = [
+            threading.Thread(target=self.work, name=f'worker-{number}')
+            for number in range(self.concurrency)
+        ]
+        heartbeat = threading.Thread(target=self.heartbeat,
+                                     name='worker-heartbeat')
+        heartbeat.start()
+        for thread in threads:
+            thread.start()
+        if not self.burst:
+            while not self.stopping.is_set():
+                self.maintain()
+                self.stopping.wait(self.maintenance_interval)
+        for thread in threads:
+            thread.join()
+        self.finished.set()
+        heartbeat.join()
+
+    def maintain(self):
+        close_old_connections()
+        try:
+            schedule_periodic_jobs()
+            requeue_stale_jobs()
+            prune_finished_jobs()
+        except Exception:
+            logger.exception('Job queue maintenance failed')
+
+    def heartbeat(self):
+        try:
+            while not self.finished.wait(settings.JOBS_HEARTBEAT_SECONDS):
+                with self.lock:
+                    job_ids = list(self.running)
+                if not job_ids:
+                    continue
+                close_old_connections()
+                try:
+                    extend_leases(job_ids)
+                except Exception:
+                    logger.exception('Extending job leases failed')
+        finally:
+            connection.close()
+
+    def work(self):
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                job = claim_job(self.queues)
+                if job is None:
+                    if self.burst:
+                        return
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                with self.lock:
+                    self.running.add(job.id)
+                try:
+                    succeeded = run_job(job)
+                finally:
+                    with self.lock:
+                        self.running.discard(job.id)
+                with self.lock:
+                    self.processed += 1
+                    self.failed += not succeeded
+        finally:
+            connection.close()
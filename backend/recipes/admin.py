@@ -1,7 +1,76 @@
 from django.contrib import admin
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
-from recipes.models import Ingredient, Recipe, Tag
+from api.ingredient_index import log_ingredient_changes
+from api.tasks import update_similarity
+from foodgram.admin import ScalableAdminMixin
+from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
+                            ShoppingCart, Tag)
 
-admin.site.register(Recipe)
-admin.site.register(Tag)
-admin.site.register(Ingredient)
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'slug')
+    search_fields = ('name', 'slug')
+    prepopulated_fields = {'slug': ('name',)}
+
+
+@admin.register(Ingredient)
+class IngredientAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'name', 'measurement_unit')
+    search_fields = ('^name',)
+
+
+class IngredientInRecipeInline(admin.TabularInline):
+    model = IngredientInRecipe
+    autocomplete_fields = ('ingredient',)
+    min_num = 1
+    extra = 0
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'recipe', 'ingredient'
+        )
+
+
+@admin.register(Recipe)
+class RecipeAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'name', 'author', 'cooking_time',
+                    'favorites_count', 'is_deleted', 'created_at')
+    list_select_related = ('author',)
+    list_filter = ('is_deleted', 'tags')
+    search_fields = ('^name',)
+    autocomplete_fields = ('author',)
+    readonly_fields = ('favorites_count', 'created_at', 'updated_at')
+    # Ingredients are edited through the inline.
+    exclude = ('ingredients',)
+    inlines = (IngredientInRecipeInline,)
+
+    def get_queryset(self, request):
+        # Counted with a subquery so only the rows of the page are counted,
+        # unlike a joined Count() that groups the whole table.
+        favorites = (
+            Favorite.objects.filter(recipe=OuterRef('pk'))
+            .order_by().values('recipe')
+            .annotate(count=Count('id')).values('count')
+        )
+        return Recipe.all_objects.annotate(favorites_count=Coalesce(
+            Subquery(favorites, output_field=IntegerField()), 0
+        ))
+
+    @admin.display(description='В избранном')
+    def favorites_count(self, obj):
+        return obj.favorites_count
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        log_ingredient_changes([form.instance.id])
+        update_similarity.delay([form.instance.id])
+
+
+@admin.register(Favorite, ShoppingCart)
+class UserRecipeAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'user', 'recipe', 'created_at')
+    list_select_related = ('user', 'recipe')
+    raw_id_fields = ('user', 'recipe')
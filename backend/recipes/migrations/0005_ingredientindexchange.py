@@ -0,0 +1,24 @@
+# Generated by Django 3.2.15 on 2026-10-19 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_alter_ingredientinrecipe_recipe'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngredientIndexChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipe_id', models.BigIntegerField(verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Изменение ингредиентов рецепта',
+                'verbose_name_plural': 'Изменения ингредиентов рецептов',
+            },
+        ),
+    ]
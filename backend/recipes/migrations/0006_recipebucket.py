@@ -0,0 +1,31 @@
+# Generated by Django 3.2.15 on 2026-10-19 17:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_ingredientindexchange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField(verbose_name='Полоса')),
+                ('bucket', models.BigIntegerField(verbose_name='Корзина')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buckets', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Корзина похожих рецептов',
+                'verbose_name_plural': 'Корзины похожих рецептов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recipebucket',
+            index=models.Index(fields=['band', 'bucket'], name='recipe_bucket_band_bucket'),
+        ),
+    ]
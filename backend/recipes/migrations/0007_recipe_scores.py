@@ -0,0 +1,59 @@
+# Generated by Django 3.2.15 on 2026-10-19 17:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def create_recipe_scores(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeScore = apps.get_model('recipes', 'RecipeScore')
+    RecipeScore.objects.bulk_create(
+        (RecipeScore(recipe_id=recipe_id)
+         for recipe_id in Recipe.objects.values_list('id', flat=True)),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipebucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeScore',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score', serialize=False, to='recipes.recipe', verbose_name='Рецепт')),
+                ('popular', models.FloatField(default=0, verbose_name='Популярность')),
+                ('trending', models.FloatField(default=0, verbose_name='Тренд')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг рецепта',
+                'verbose_name_plural': 'Рейтинги рецептов',
+            },
+        ),
+        migrations.AddField(
+            model_name='favorite',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='recipescore',
+            index=models.Index(fields=['-popular', '-recipe'], name='recipe_score_popular'),
+        ),
+        migrations.AddIndex(
+            model_name='recipescore',
+            index=models.Index(fields=['-trending', '-recipe'], name='recipe_score_trending'),
+        ),
+        migrations.RunPython(create_recipe_scores, migrations.RunPython.noop),
+    ]
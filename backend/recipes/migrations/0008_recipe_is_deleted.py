@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-19 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='is_deleted',
+            field=models.BooleanField(default=False, verbose_name='Удалён'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-19 17:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_is_deleted'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(db_index=True, upload_to='recipes/images', verbose_name='Фотография'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+# Admin and API prefix searches compile to UPPER(column::text) LIKE 'X%',
+# which only an index on that expression with text_pattern_ops can serve.
+INDEXES = (
+    ('recipe_name_upper_prefix', 'recipes_recipe', 'name'),
+    ('ingredient_name_upper_prefix', 'recipes_ingredient', 'name'),
+)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('recipes', '0010_timestamps'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} '
+            f'ON {table} (UPPER({column}::text) text_pattern_ops)',
+            f'DROP INDEX CONCURRENTLY IF EXISTS {name}',
+        )
+        for name, table, column in INDEXES
+    ]
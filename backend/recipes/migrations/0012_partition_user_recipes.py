@@ -0,0 +1,83 @@
+from django.db import migrations
+
+# Favorites and shopping carts are read by user, so they are split into
+# hash partitions of user_id: a user's rows, and the indexes over them,
+# live in one small partition. PostgreSQL requires the partition key in
+# every unique index, hence the (id, user_id) primary key; unique_favorite
+# and unique_shopping_cart already start with user_id.
+PARTITIONS = 32
+
+TABLES = (
+    ('recipes_favorite', 'unique_favorite',
+     'recipes_favorite_recipe_id_288529df',
+     'recipes_favorite_recipe_id_288529df_fk_recipes_recipe_id',
+     'recipes_favorite_user_id_dd4f6854_fk_users_user_id'),
+    ('recipes_shoppingcart', 'unique_shopping_cart',
+     'recipes_shoppingcart_recipe_id_7b01d980',
+     'recipes_shoppingcart_recipe_id_7b01d980_fk_recipes_recipe_id',
+     'recipes_shoppingcart_user_id_9cf94f11_fk_users_user_id'),
+)
+
+
+def rebuild_table(table, unique, recipe_index, recipe_fk, user_fk,
+                  partitioned):
+    """SQL that copies `table` into a new (partitioned or plain) table."""
+    if partitioned:
+        create = [
+            f'CREATE TABLE {table}_new (LIKE {table} INCLUDING DEFAULTS) '
+            f'PARTITION BY HASH (user_id)',
+            *(
+                f'CREATE TABLE {table}_p{remainder} PARTITION OF '
+                f'{table}_new FOR VALUES WITH '
+                f'(MODULUS {PARTITIONS}, REMAINDER {remainder})'
+                for remainder in range(PARTITIONS)
+            ),
+        ]
+        primary_key = '(id, user_id)'
+        user_index = []
+    else:
+        create = [
+            f'CREATE TABLE {table}_new (LIKE {table} INCLUDING DEFAULTS)',
+        ]
+        primary_key = '(id)'
+        user_index = [
+            f'CREATE INDEX {user_fk.split("_fk_")[0]} '
+            f'ON {table} (user_id)',
+        ]
+    return [
+        *create,
+        f'INSERT INTO {table}_new SELECT * FROM {table}',
+        f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}_new.id',
+        f'DROP TABLE {table}',
+        f'ALTER TABLE {table}_new RENAME TO {table}',
+        f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey '
+        f'PRIMARY KEY {primary_key}',
+        f'ALTER TABLE {table} ADD CONSTRAINT {unique} '
+        f'UNIQUE (user_id, recipe_id)',
+        f'CREATE INDEX {recipe_index} ON {table} (recipe_id)',
+        *user_index,
+        f'ALTER TABLE {table} ADD CONSTRAINT {recipe_fk} '
+        f'FOREIGN KEY (recipe_id) REFERENCES recipes_recipe (id) '
+        f'DEFERRABLE INITIALLY DEFERRED',
+        f'ALTER TABLE {table} ADD CONSTRAINT {user_fk} '
+        f'FOREIGN KEY (user_id) REFERENCES users_user (id) '
+        f'DEFERRABLE INITIALLY DEFERRED',
+        # Autovacuum analyzes the partitions but never the parent.
+        f'ANALYZE {table}',
+    ]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_search_indexes'),
+        ('users', '0005_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            rebuild_table(*names, partitioned=True),
+            rebuild_table(*names, partitioned=False),
+        )
+        for names in TABLES
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 3.2.15 on 2026-10-19 18:12
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """Point recipes to the oldest of equal ingredients, drop the rest."""
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientInRecipe = apps.get_model('recipes', 'IngredientInRecipe')
+    IngredientIndexChange = apps.get_model('recipes',
+                                           'IngredientIndexChange')
+    RecipeIngredient = apps.get_model('recipes', 'Recipe').ingredients.through
+    duplicates = (
+        Ingredient.objects
+        .values('name', 'measurement_unit')
+        .annotate(kept=Min('id'), count=Count('id'))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        kept = duplicate['kept']
+        merged = Ingredient.objects.filter(
+            name=duplicate['name'],
+            measurement_unit=duplicate['measurement_unit']
+        ).exclude(id=kept).values_list('id', flat=True)
+        for ingredient_id in merged:
+            for model in (IngredientInRecipe, RecipeIngredient):
+                rows = model.objects.filter(ingredient_id=ingredient_id)
+                IngredientIndexChange.objects.bulk_create(
+                    IngredientIndexChange(recipe_id=recipe_id)
+                    for recipe_id in rows.values_list('recipe_id', flat=True)
+                )
+                # A recipe with both ingredients keeps the first one.
+                rows.filter(recipe_id__in=model.objects.filter(
+                    ingredient_id=kept
+                ).values('recipe_id')).delete()
+                rows.update(ingredient_id=kept)
+        Ingredient.objects.filter(id__in=list(merged)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_partition_user_recipes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True, verbose_name='Название')),
+                ('line', models.PositiveBigIntegerField(default=0, verbose_name='Последняя строка')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Контрольная точка импорта',
+                'verbose_name_plural': 'Контрольные точки импорта',
+            },
+        ),
+        migrations.RunPython(merge_duplicate_ingredients,
+                             migrations.RunPython.noop),
+    ]
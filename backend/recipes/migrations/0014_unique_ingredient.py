@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Kept apart from 0013: its deletes leave deferred foreign key checks
+    # that only run at commit, and PostgreSQL cannot alter a table with
+    # pending checks.
+    dependencies = [
+        ('recipes', '0013_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+    ]
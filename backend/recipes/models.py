@@ -9,6 +9,8 @@ class Tag(models.Model):
         max_length=75, unique=True, verbose_name='Название'
     )
     slug = models.SlugField(max_length=75, unique=True, verbose_name='Слаг')
+    created_at = models.DateTimeField('Дата создания', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         verbose_name = 'Тег'
@@ -21,15 +23,30 @@ class Tag(models.Model):
 class Ingredient(models.Model):
     name = models.CharField('Название', max_length=144)
     measurement_unit = models.CharField('Единица измерения', max_length=144)
+    created_at = models.DateTimeField('Дата создания', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient'
+            )
+        ]
 
     def __str__(self):
         return self.name
 
 
+class VisibleRecipeManager(models.Manager):
+    """Hides recipes deleted through the API until they are purged."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
 class Recipe(models.Model):
     ingredients = models.ManyToManyField(
         Ingredient, verbose_name='Ингредиенты'
@@ -39,9 +56,17 @@ class Recipe(models.Model):
     )
     tags = models.ManyToManyField(Tag, verbose_name='Теги')
     name = models.TextField('Название', max_length=100)
-    image = models.ImageField('Фотография', upload_to='recipes/images')
+    image = models.ImageField(
+        'Фотография', upload_to='recipes/images', db_index=True
+    )
     text = models.TextField('Описание', max_length=500)
     cooking_time = models.PositiveIntegerField('Время приготовления')
+    is_deleted = models.BooleanField('Удалён', default=False)
+    created_at = models.DateTimeField('Дата создания', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+
+    objects = VisibleRecipeManager()
+    all_objects = models.Manager()
 
     class Meta:
         verbose_name = 'Рецепт'
@@ -60,6 +85,7 @@ class ShoppingCart(models.Model):
         related_name='shopping_cart'
 
     )
+    created_at = models.DateTimeField('Дата добавления', auto_now_add=True)
 
     class Meta:
         verbose_name = 'Список покупок'
@@ -83,6 +109,7 @@ class Favorite(models.Model):
         Recipe, on_delete=models.CASCADE, verbose_name='Рецепт',
         related_name='is_favorited'
     )
+    created_at = models.DateTimeField('Дата добавления', auto_now_add=True)
 
     class Meta:
         verbose_name = 'Избранное'
@@ -121,3 +148,70 @@ class IngredientInRecipe(models.Model):
 
     def __str__(self):
         return f'{self.recipe}, {self.ingredient} и {self.amount} '
+
+
+class IngredientIndexChange(models.Model):
+    recipe_id = models.BigIntegerField('Рецепт')
+
+    class Meta:
+        verbose_name = 'Изменение ингредиентов рецепта'
+        verbose_name_plural = 'Изменения ингредиентов рецептов'
+
+    def __str__(self):
+        return f'{self.recipe_id}'
+
+
+class RecipeBucket(models.Model):
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE, verbose_name='Рецепт',
+        related_name='buckets'
+    )
+    band = models.PositiveSmallIntegerField('Полоса')
+    bucket = models.BigIntegerField('Корзина')
+
+    class Meta:
+        verbose_name = 'Корзина похожих рецептов'
+        verbose_name_plural = 'Корзины похожих рецептов'
+        indexes = [
+            models.Index(fields=['band', 'bucket'],
+                         name='recipe_bucket_band_bucket')
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id}, {self.band}: {self.bucket}'
+
+
+class RecipeScore(models.Model):
+    recipe = models.OneToOneField(
+        Recipe, on_delete=models.CASCADE, primary_key=True,
+        verbose_name='Рецепт', related_name='score'
+    )
+    popular = models.FloatField('Популярность', default=0)
+    trending = models.FloatField('Тренд', default=0)
+    updated_at = models.DateTimeField('Дата обновления', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+        indexes = [
+            models.Index(fields=['-popular', '-recipe'],
+                         name='recipe_score_popular'),
+            models.Index(fields=['-trending', '-recipe'],
+                         name='recipe_score_trending'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id}: {self.popular:.2f}, {self.trending:.2f}'
+
+
+class ImportCheckpoint(models.Model):
+    name = models.CharField('Название', max_length=200, unique=True)
+    line = models.PositiveBigIntegerField('Последняя строка', default=0)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Контрольная точка импорта'
+        verbose_name_plural = 'Контрольные точки импорта'
+
+    def __str__(self):
+        return f'{self.name}: {self.line}'
@@ -0,0 +1,31 @@
+from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+
+from foodgram.admin import ScalableAdminMixin
+from users.models import Subscribe, User
+
+
+@admin.register(User)
+class UserAdmin(ScalableAdminMixin, BaseUserAdmin):
+    list_display = ('id', 'username', 'email', 'first_name', 'last_name',
+                    'is_staff', 'is_deleted')
+    list_filter = ('is_staff', 'is_active', 'is_deleted')
+    search_fields = ('^username', '^email')
+    ordering = ('-id',)
+    fieldsets = BaseUserAdmin.fieldsets + (
+        ('Профиль', {'fields': ('avatar', 'is_deleted')}),
+    )
+    add_fieldsets = (
+        (None, {
+            'classes': ('wide',),
+            'fields': ('username', 'email', 'first_name', 'last_name',
+                       'password1', 'password2'),
+        }),
+    )
+
+
+@admin.register(Subscribe)
+class SubscribeAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'user', 'author')
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
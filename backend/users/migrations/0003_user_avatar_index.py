@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-19 17:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_is_deleted'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='avatar',
+            field=models.ImageField(blank=True, db_index=True, upload_to='', verbose_name='Фотография'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+# Admin prefix searches compile to UPPER(column::text) LIKE 'X%', which
+# only an index on that expression with text_pattern_ops can serve.
+INDEXES = (
+    ('user_username_upper_prefix', 'users_user', 'username'),
+    ('user_email_upper_prefix', 'users_user', 'email'),
+)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('users', '0004_user_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} '
+            f'ON {table} (UPPER({column}::text) text_pattern_ops)',
+            f'DROP INDEX CONCURRENTLY IF EXISTS {name}',
+        )
+        for name, table, column in INDEXES
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.2.15 on 2026-10-19 17:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                ('author', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('similar_author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Похожий автор')),
+            ],
+            options={
+                'verbose_name': 'Похожий автор',
+                'verbose_name_plural': 'Похожие авторы',
+            },
+        ),
+        migrations.CreateModel(
+            name='AuthorRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Оценка')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommended_to', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Рекомендация автора',
+                'verbose_name_plural': 'Рекомендации авторов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='authorsimilarity',
+            index=models.Index(fields=['author', '-score'], name='author_similarity_author'),
+        ),
+        migrations.AddIndex(
+            model_name='authorrecommendation',
+            index=models.Index(fields=['user', '-score'], name='author_recommendation_user'),
+        ),
+    ]
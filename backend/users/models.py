@@ -9,7 +9,9 @@ class User(AbstractUser):
         max_length=254,
         unique=True,
     )
-    avatar = models.ImageField('Фотография', blank=True)
+    avatar = models.ImageField('Фотография', blank=True, db_index=True)
+    is_deleted = models.BooleanField('Удалён', default=False)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = [
         'username',
@@ -46,3 +48,50 @@ class Subscribe(models.Model):
                 name='unique_subscribe'
             )
         ]
+
+
+class AuthorSimilarity(models.Model):
+    """Nearest neighbours of an author in the co-follow graph."""
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, verbose_name='Автор',
+        related_name='+', db_index=False
+    )
+    similar_author = models.ForeignKey(
+        User, on_delete=models.CASCADE, verbose_name='Похожий автор',
+        related_name='+'
+    )
+    score = models.FloatField('Сходство')
+
+    class Meta:
+        verbose_name = 'Похожий автор'
+        verbose_name_plural = 'Похожие авторы'
+        indexes = [
+            models.Index(fields=['author', '-score'],
+                         name='author_similarity_author')
+        ]
+
+    def __str__(self):
+        return f'{self.author_id} ~ {self.similar_author_id}: {self.score:.3f}'
+
+
+class AuthorRecommendation(models.Model):
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, verbose_name='Пользователь',
+        related_name='+', db_index=False
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, verbose_name='Автор',
+        related_name='recommended_to'
+    )
+    score = models.FloatField('Оценка')
+
+    class Meta:
+        verbose_name = 'Рекомендация автора'
+        verbose_name_plural = 'Рекомендации авторов'
+        indexes = [
+            models.Index(fields=['user', '-score'],
+                         name='author_recommendation_user')
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.author_id}: {self.score:.3f}'